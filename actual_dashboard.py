@@ -1,11 +1,149 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, font
 from auth_manager import AuthManager
-from penny import BudgetManager
-from sms_reader import SMSReader
-import json
+from penny_service import PennyService
+from metrics import METRICS, instrument_reader
 import os
+import queue
 import sys
+import threading
+import time
+
+class IngestionWorker(threading.Thread):
+    """
+    Parses new SMS off the Tk thread and hands transaction batches back through a queue
+    Nothing is marked processed here: the Tk thread does that after storing each batch
+    """
+    def __init__(self, sms_reader, limit=None, batch_size=500):
+        super().__init__(daemon=True)
+        self.sms_reader = sms_reader
+        self.limit = limit
+        self.batch_size = batch_size
+        self.results = queue.Queue(maxsize=64)  # bounded: parsing waits if the UI falls behind
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def run(self):
+        """Produces ('batch', ([sms id, ...], [Transaction, ...])) items, then ('error', exc) and/or ('done', count)"""
+        count = 0
+        ids, batch = [], []
+        sms_iter = self.sms_reader.iter_new_sms()
+        try:
+            for sms_id, tx in sms_iter:
+                ids.append(sms_id)
+                batch.append(tx)
+                count += 1
+                if len(batch) >= self.batch_size:
+                    self.results.put(('batch', (ids, batch)))
+                    ids, batch = [], []
+                if self.cancelled.is_set() or (self.limit is not None and count >= self.limit):
+                    break
+        except Exception as e:
+            self.results.put(('error', e))
+        finally:
+            sms_iter.close()
+            if batch:
+                self.results.put(('batch', (ids, batch)))
+            self.results.put(('done', count))
+
+
+class VirtualTransactionList:
+    """Treeview that materializes only the visible window of the ledger, newest first"""
+    COLUMNS = ('date', 'amount', 'type', 'merchant', 'category', 'source')
+
+    def __init__(self, parent, budget_manager, style, row_height=25):
+        self.budget_manager = budget_manager
+        self.row_height = row_height
+        self.first = 0          # ledger offset (newest first) of the top visible row
+        self.visible_rows = 20  # recomputed from the widget height
+
+        self.tree = ttk.Treeview(parent,
+                                 columns=self.COLUMNS,
+                                 show='headings',
+                                 style=style,
+                                 height=self.visible_rows)
+
+        # Configure columns
+        self.tree.heading('date', text='Date')
+        self.tree.heading('amount', text='Amount')
+        self.tree.heading('type', text='Type')
+        self.tree.heading('merchant', text='Merchant')
+        self.tree.heading('category', text='Category')
+        self.tree.heading('source', text='Source')
+        self.tree.column('date', width=120, anchor='w')
+        self.tree.column('amount', width=120, anchor='e')
+        self.tree.column('type', width=100, anchor='center')
+        self.tree.column('merchant', width=160, anchor='w')
+        self.tree.column('category', width=140, anchor='w')
+        self.tree.column('source', width=160, anchor='w')
+
+        # The scrollbar drives the virtual offset, not the Treeview's own yview
+        self.scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self.on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+
+        self.tree.bind('<Configure>', self.on_resize)
+        self.tree.bind('<MouseWheel>', lambda e: self.scroll_by(-1 if e.delta > 0 else 1, 'units'))
+        self.tree.bind('<Button-4>', lambda e: self.scroll_by(-1, 'units'))
+        self.tree.bind('<Button-5>', lambda e: self.scroll_by(1, 'units'))
+
+    def total(self):
+        return self.budget_manager.count()
+
+    def on_resize(self, event):
+        """Fit the number of materialized rows to the widget height"""
+        rows = max(1, (event.height - self.row_height) // self.row_height)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.refresh()
+
+    def on_scroll(self, action, amount, unit=None):
+        """Scrollbar command: 'moveto fraction' or 'scroll n units|pages'"""
+        if action == 'moveto':
+            self.first = int(float(amount) * self.total())
+            self.refresh()
+        else:
+            self.scroll_by(int(amount), unit)
+
+    def scroll_by(self, amount, unit):
+        step = self.visible_rows if unit == 'pages' else 1
+        self.first += amount * step
+        self.refresh()
+        return 'break'
+
+    def notify_appended(self, count):
+        """Keep the rows in view anchored when new transactions arrive above them (call before refresh)"""
+        if self.first > 0:
+            self.first += count
+
+    def refresh(self):
+        """Re-fill the visible rows in place from the in-memory ledger"""
+        total = self.total()
+        self.first = max(0, min(self.first, total - self.visible_rows))
+        rows = self.budget_manager.get_transactions(limit=self.visible_rows, offset=self.first)
+
+        items = self.tree.get_children()
+        for index, tx in enumerate(rows):
+            values = (tx.date.strftime("%Y-%m-%d"),
+                      f"₦{tx.amount:,.2f}",
+                      tx.trans_type.capitalize(),
+                      tx.merchant or '',
+                      tx.category or '',
+                      tx.source)
+            if index < len(items):
+                self.tree.item(items[index], values=values)
+            else:
+                self.tree.insert('', 'end', values=values)
+        if len(items) > len(rows):
+            self.tree.delete(*items[len(rows):])
+
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + len(rows)) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
 
 class DashboardWindow:
     """Main application dashboard showing budget status and transactions"""
@@ -13,8 +151,12 @@ class DashboardWindow:
         self.phone = phone
         self.root = tk.Tk()
         self.root.title(f"Budget Tracker - {phone}")
-        self.budget_manager = BudgetManager()
-        self.sms_reader = SMSReader()
+        # Per-user data partition (data/users/<phone>/)
+        self.tenant = PennyService().get(phone)
+        self.budget_manager = self.tenant.budget_manager
+        self.rule_engine = self.tenant.rule_engine
+        self.sms_reader = instrument_reader(self.tenant.sms_reader)  # stage timers if PENNY_METRICS is set
+        self.worker = None  # active IngestionWorker, if any
 
         # Window configuration - centered on screen
         window_width = 900
@@ -29,12 +171,9 @@ class DashboardWindow:
         # UI styling configuration
         self.configure_styles()
         self.create_widgets()
-        self.process_sms()  # Automatically process SMS on startup
         self.update_dashboard()
-
-        # Check for budget breaches
-        if self.budget_manager.is_budget_breached():
-            messagebox.showwarning("Budget Alert", "Budget limit exceeded!")
+        # Automatic startup ingestion waits until the window is on screen
+        self.root.bind('<Map>', self.on_first_map)
 
         self.root.mainloop()
 
@@ -153,45 +292,55 @@ class DashboardWindow:
         # Transactions card with treeview
         transactions_card = self.create_card(right_frame, "Recent Transactions", True)
 
-        # Transaction treeview setup
-        self.transaction_tree = ttk.Treeview(transactions_card,
-                                          columns=('date', 'amount', 'type', 'source'),
-                                          show='headings',
-                                          style='Custom.Treeview')
-
-        # Configure columns
-        self.transaction_tree.heading('date', text='Date')
-        self.transaction_tree.heading('amount', text='Amount')
-        self.transaction_tree.heading('type', text='Type')
-        self.transaction_tree.heading('source', text='Source')
-        self.transaction_tree.column('date', width=120, anchor='w')
-        self.transaction_tree.column('amount', width=120, anchor='e')
-        self.transaction_tree.column('type', width=100, anchor='center')
-        self.transaction_tree.column('source', width=200, anchor='w')
-
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(transactions_card,
-                                orient=tk.VERTICAL,
-                                command=self.transaction_tree.yview)
-        self.transaction_tree.configure(yscroll=scrollbar.set)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.transaction_tree.pack(fill=tk.BOTH, expand=True)
+        # Virtualized transaction list (only visible rows exist in the Treeview)
+        self.transaction_list = VirtualTransactionList(transactions_card,
+                                                       self.budget_manager,
+                                                       style='Custom.Treeview')
+        self.transaction_tree = self.transaction_list.tree
 
         # Process SMS button
         button_frame = tk.Frame(transactions_card, bg=self.card_color)
         button_frame.pack(fill=tk.X, pady=(10, 0))
-        ttk.Button(button_frame,
-                 text="Process New SMS",
-                 style='Accent.TButton',
-                 command=self.process_sms).pack(fill=tk.X)
+        self.process_buttons = [
+            ttk.Button(button_frame,
+                     text="Process New SMS",
+                     style='Accent.TButton',
+                     command=self.process_sms),
+            ttk.Button(button_frame,
+                     text="Process All SMS",
+                     style='Accent.TButton',
+                     command=lambda: self.process_sms(limit=None)),
+        ]
+        self.process_buttons[0].pack(fill=tk.X)
+        self.process_buttons[1].pack(fill=tk.X, pady=(5, 0))
+
+        # Ingestion progress and cancellation
+        progress_frame = tk.Frame(button_frame, bg=self.card_color)
+        progress_frame.pack(fill=tk.X, pady=(5, 0))
+        self.progress_var = tk.StringVar()
+        self.progress_bar = ttk.Progressbar(progress_frame, mode='indeterminate')
+        self.progress_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.cancel_button = ttk.Button(progress_frame,
+                                      text="Cancel",
+                                      command=self.cancel_processing,
+                                      state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=(5, 0))
+        tk.Label(button_frame,
+                textvariable=self.progress_var,
+                font=('Helvetica', 9),
+                bg=self.card_color).pack(anchor='w')
 
     def exit_app(self):
         """Close the application completely"""
+        self.finish_ingestion()
+        self.tenant.close()
         self.root.destroy()
         sys.exit()
 
     def logout(self):
         """Log out the user and return to login screen"""
+        self.finish_ingestion()
+        self.tenant.close()
         self.root.destroy()  # Close the dashboard
         root = tk.Tk()  # Create new root window
         LoginWindow(root)  # Show login window
@@ -212,29 +361,118 @@ class DashboardWindow:
                 bg=self.card_color).pack(anchor='w', pady=(0, 5))
         return card
 
-    def process_sms(self):
-        """Process SMS messages and update transactions"""
+    def on_first_map(self, event):
+        """Kick off the startup ingestion once the first paint has been queued"""
+        if event.widget is not self.root:
+            return  # <Map> on the root also fires for every child widget
+        self.root.unbind('<Map>')
+        self.root.after_idle(lambda: self.process_sms(announce=False))
+
+    def process_sms(self, limit=1, announce=True):
+        """
+        Start background SMS processing (all new messages if limit is None)
+        With announce=False success is reported in the status line, not a dialog
+        """
+        if self.worker is not None:
+            return  # already running
+
+        self.worker = IngestionWorker(self.sms_reader, limit=limit)
+        self.processed_count = 0
+        self.announce_result = announce
+        self.processing_started = time.perf_counter()
+        for button in self.process_buttons:
+            button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.progress_bar.start(10)
+        self.progress_var.set("Processing SMS...")
+        self.worker.start()
+        self.root.after(50, self.drain_ingestion)
+
+    def cancel_processing(self):
+        """Ask the background worker to stop after the current message"""
+        if self.worker is not None:
+            self.worker.cancel()
+
+    def finish_ingestion(self):
+        """Stop the worker and store everything it already parsed (before the tenant is closed)"""
+        worker, self.worker = self.worker, None
+        if worker is None:
+            return
+        worker.cancel()
+        # Keep draining while joining: the worker may be blocked on the bounded queue
+        while worker.is_alive() or not worker.results.empty():
+            try:
+                kind, payload = worker.results.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            if kind == 'batch':
+                self.apply_batch(*payload)
+        worker.join()
+
+    def apply_batch(self, sms_ids, transactions):
+        """Store one parsed batch, then mark its SMS processed"""
+        # Add to budget manager (journaled as one write per batch)
+        self.budget_manager.add_transactions(transactions)
+        self.sms_reader.mark_processed(sms_ids)
+        self.transaction_list.notify_appended(len(transactions))
+
+    def drain_ingestion(self):
+        """Apply finished batches on the Tk thread, refreshing the UI once per drain"""
+        if self.worker is None:
+            return  # stopped by finish_ingestion
+        added = 0
+        done = False
+        error = None
         try:
-            # Read and process SMS data
-            transactions = self.sms_reader.read_sms()
+            while True:
+                kind, payload = self.worker.results.get_nowait()
+                if kind == 'batch':
+                    self.apply_batch(*payload)
+                    added += len(payload[1])
+                elif kind == 'error':
+                    error = payload
+                else:
+                    done = True
+                    break
+        except queue.Empty:
+            pass
 
-            # Add to budget manager
-            for tx in transactions:
-                self.budget_manager.add_transaction(tx)
+        if added:
+            self.processed_count += added
+            self.progress_var.set(f"Processed {self.processed_count:,} transactions...")
+            with METRICS.stage("ui_refresh"):
+                self.update_dashboard()
 
-            # Save to file
-            self.budget_manager.export_transactions()
-            messagebox.showinfo("Success", f"Processed {len(transactions)} new transactions")
+        if not done:
+            self.root.after(50, self.drain_ingestion)
+            return
 
-            # Update display
-            self.update_dashboard()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to process SMS: {str(e)}")
+        cancelled = self.worker.cancelled.is_set()
+        self.worker = None
+        if METRICS.enabled:
+            METRICS.observe("process_sms", time.perf_counter() - self.processing_started)
+            METRICS.write()
+        self.progress_bar.stop()
+        self.cancel_button.config(state=tk.DISABLED)
+        for button in self.process_buttons:
+            button.config(state=tk.NORMAL)
+        self.progress_var.set(f"{'Cancelled after' if cancelled else 'Processed'} "
+                              f"{self.processed_count:,} new transactions")
+
+        if error is not None:
+            messagebox.showerror("Error", f"Failed to process SMS: {str(error)}")
+        elif self.announce_result:
+            messagebox.showinfo("Success", f"Processed {self.processed_count} new transactions")
+
+        # Alert on thresholds crossed by this run
+        events = self.rule_engine.take_events()
+        if events:
+            messagebox.showwarning("Budget Alert", "\n".join(event.message for event in events))
 
     def update_dashboard(self):
         """Refresh all dashboard data displays"""
         # Update budget information
-        monthly_budget = self.budget_manager.budgets.get("monthly", 0)
+        monthly_budget = self.budget_manager.budget_for()
         self.budget_var.set(f"₦{monthly_budget:,.2f}")
 
         # Update spending information
@@ -258,55 +496,29 @@ class DashboardWindow:
         self.update_transactions()
 
     def update_transactions(self):
-        """Reload and display transactions from file"""
-        # Clear existing entries
-        for item in self.transaction_tree.get_children():
-            self.transaction_tree.delete(item)
-
-        try:
-            # Load transactions from JSON file
-            with open("transactions.json", "r") as f:
-                transactions = json.load(f)
-
-                # Add transactions in reverse chronological order
-                for tx in reversed(transactions):
-                    amount = f"₦{float(tx['amount']):,.2f}"
-                    self.transaction_tree.insert('', 'end', values=(
-                        tx['date'],
-                        amount,
-                        tx['type'].capitalize(),
-                        tx['source']
-                    ))
-        except FileNotFoundError:
-            pass
-        except json.JSONDecodeError:
-            messagebox.showerror("Error", "Corrupted transactions file")
+        """Refresh the visible window of the transaction list"""
+        self.transaction_list.refresh()
 
     def update_budget(self):
-        """Update the monthly budget amount"""
+        """Set the monthly budget from this month on; history and transactions are kept"""
         new_budget = self.new_budget_entry.get()
         try:
             # Validate and update budget
             new_budget = float(new_budget)
             if new_budget < 0:
                 raise ValueError("Budget cannot be negative")
-
-            # Confirmation dialog
-            if not messagebox.askyesno(
-                "Confirm Reset",
-                "This will clear all transactions and restart processing.\nAre you sure?",
-                icon='warning'
-            ):
-                return  # User clicked No
-
-            self.budget_manager.update_budget(new_budget)
-            self.sms_reader.reset_processed_ids()  # Clear processed SMS records
-            self.budget_manager.transactions = []  # Reset transactions
-            self.budget_manager.export_transactions()  # Clear transactions file
-            messagebox.showinfo("Success", "Budget updated and transactions reset")
-            self.update_dashboard()
         except ValueError as e:
             messagebox.showerror("Error", f"Invalid budget amount: {str(e)}")
+            return
+
+        self.budget_manager.update_budget(new_budget)
+        self.rule_engine.reevaluate()  # checks the new limit against existing monthly totals
+        self.update_dashboard()
+        messagebox.showinfo("Success", "Budget updated")
+
+        events = self.rule_engine.take_events()
+        if events:
+            messagebox.showwarning("Budget Alert", "\n".join(event.message for event in events))
 
 class LoginWindow:
     """Handles user authentication with a modern UI login screen"""
@@ -439,6 +651,7 @@ class LoginWindow:
 
 def main():
     """Application entry point"""
+    METRICS.enable_from_env()  # PENNY_METRICS=<dir> records per-stage timings
     root = tk.Tk()
     LoginWindow(root)
     root.mainloop()
@@ -1,13 +1,40 @@
+import hashlib
+import hmac
 import random
 import string
 import json
 import os
+import sqlite3
+
+# Default PBKDF2 work factor; see benchmarks/bench_auth.py for login latency per setting
+PBKDF2_ITERATIONS = 200_000
+
+
+def hash_password(password, iterations=PBKDF2_ITERATIONS, salt=None):
+    salt = salt or os.urandom(16)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+    return f"pbkdf2_sha256${iterations}${salt.hex()}${digest.hex()}"
+
+
+def verify_password(password, encoded):
+    algorithm, iterations, salt, digest = encoded.split('$')
+    if algorithm != 'pbkdf2_sha256':
+        return False
+    candidate = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), bytes.fromhex(salt), int(iterations))
+    return hmac.compare_digest(candidate.hex(), digest)
+
 
 # Class: AuthManager
 class AuthManager:
-    def __init__(self, db_file='user_db.json'):
-        self.db_file = db_file
-        self.users = self.load_users()
+    def __init__(self, db_file='user_db.json', store_file='data/users.db', iterations=PBKDF2_ITERATIONS):
+        self.db_file = db_file  # legacy plaintext JSON store, migrated once
+        self.store_file = store_file
+        self.iterations = iterations
+        os.makedirs(os.path.dirname(store_file) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(store_file)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS users (phone TEXT PRIMARY KEY, password_hash TEXT NOT NULL)")
+        self.migrate_users()
 
     def load_users(self):
         if not os.path.exists(self.db_file):
@@ -15,19 +42,47 @@ class AuthManager:
         with open(self.db_file, 'r') as f:
             return json.load(f)
 
-    def save_users(self):
-        with open(self.db_file, 'w') as f:
-            json.dump(self.users, f, indent=4)
+    def migrate_users(self):
+        # Import and hash users from the legacy JSON file; existing phones are left untouched
+        users = self.load_users()
+        if not users:
+            return 0
+        existing = {row[0] for row in self.conn.execute("SELECT phone FROM users")}
+        new_users = {phone: data for phone, data in users.items() if phone not in existing}
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO users (phone, password_hash) VALUES (?, ?)",
+                [(phone, hash_password(data['password'], self.iterations)) for phone, data in new_users.items()]
+            )
+        self._remove_legacy_db()
+        return len(new_users)
+
+    def _remove_legacy_db(self):
+        # Only called once the hashes are committed: the plaintext passwords must not outlive the import
+        try:
+            os.remove(self.db_file)
+        except FileNotFoundError:
+            pass
 
     def generate_otp(self):
         return ''.join(random.choices(string.digits + string.ascii_uppercase, k=6))
 
     def register_user(self, phone, password):
-        if phone in self.users:
+        try:
+            with self.conn:
+                self.conn.execute("INSERT INTO users (phone, password_hash) VALUES (?, ?)",
+                                  (phone, hash_password(password, self.iterations)))
+        except sqlite3.IntegrityError:
             return False, "User already exists."
-        self.users[phone] = {"password": password}
-        self.save_users()
         return True, "User registered successfully."
 
     def authenticate_user(self, phone, password):
-        return phone in self.users and self.users[phone]['password'] == password
\ No newline at end of file
+        row = self.conn.execute("SELECT password_hash FROM users WHERE phone = ?", (phone,)).fetchone()
+        if row is None or not verify_password(password, row[0]):
+            return False
+        # Upgrade hashes made with an older work factor on successful login
+        if int(row[0].split('$')[1]) != self.iterations:
+            with self.conn:
+                self.conn.execute("UPDATE users SET password_hash = ? WHERE phone = ?",
+                                  (hash_password(password, self.iterations), phone))
+        return True
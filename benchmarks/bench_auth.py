@@ -0,0 +1,64 @@
+# benchmarks/bench_auth.py
+# Login latency per PBKDF2 work factor, plus registration/lookup cost vs user count
+#
+#   python benchmarks/bench_auth.py --users 20000
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth_manager import AuthManager, hash_password, verify_password
+
+
+def bench_work_factor(iterations_list, repeat=5):
+    print("PBKDF2 iterations -> verify latency")
+    for iterations in iterations_list:
+        encoded = hash_password("secret", iterations)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            verify_password("secret", encoded)
+        elapsed = (time.perf_counter() - start) / repeat
+        print(f"  {iterations:>9,}  {elapsed * 1000:8.2f} ms")
+
+
+def bench_store(users, iterations):
+    with tempfile.TemporaryDirectory() as tmp:
+        auth = AuthManager(db_file=os.path.join(tmp, "none.json"),
+                           store_file=os.path.join(tmp, "users.db"),
+                           iterations=iterations)
+        print(f"user store ({iterations:,} iterations)")
+        checkpoints = sorted({users // 10, users // 2, users})
+        registered = 0
+        start = time.perf_counter()
+        for target in checkpoints:
+            while registered < target:
+                auth.register_user(f"0800{registered:07d}", "secret")
+                registered += 1
+            elapsed = time.perf_counter() - start
+
+            probe = time.perf_counter()
+            assert auth.authenticate_user(f"0800{registered // 2:07d}", "secret")
+            login = time.perf_counter() - probe
+            print(f"  {registered:>9,} users  register {registered / elapsed:8,.0f}/s  login {login * 1000:6.2f} ms")
+
+        start = time.perf_counter()
+        AuthManager(db_file=os.path.join(tmp, "none.json"), store_file=os.path.join(tmp, "users.db"))
+        print(f"  startup with {registered:,} users: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--store-iterations", type=int, default=1000,
+                        help="Work factor for the store benchmark (kept low so it measures storage)")
+    args = parser.parse_args()
+
+    bench_work_factor([10_000, 100_000, 200_000, 600_000])
+    bench_store(args.users, args.store_iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# benchmarks/bench_classifier.py
+# Merchant classification throughput against a large merchant dictionary:
+# the Aho-Corasick MerchantClassifier vs a loop of `in` checks and one big regex
+#
+#   python benchmarks/bench_classifier.py --merchants 10000 --count 100000
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sms_reader import AmountExtractor, MerchantClassifier, TemplateCache
+from synthetic import generate_merchants, generate_sms
+
+
+def keyword_table(merchants):
+    """Flat (keyword, (merchant, category)) list, in MerchantClassifier's insertion order"""
+    table, seen = [], set()
+    for category, entries in merchants.items():
+        for merchant, entry in entries.items():
+            for keyword in MerchantClassifier.entry_keywords(merchant, entry):
+                keyword = keyword.lower().strip()
+                if keyword and keyword not in seen:
+                    seen.add(keyword)
+                    table.append((keyword, (merchant or None, category)))
+    return table
+
+
+def naive_classify(table, message):
+    """One `in` check per keyword, then the same ranking as MerchantClassifier"""
+    text = message.lower()
+    best = best_key = None
+    for keyword, label in table:
+        if keyword in text:
+            start = text.find(keyword)
+            key = (label[0] is None, start, -len(keyword))
+            if best_key is None or key < best_key:
+                best, best_key = label, key
+    return best
+
+
+def regex_classifier(table):
+    """One alternation over every keyword, longest first so aliases win over their prefixes"""
+    labels = dict(table)
+    ordered = sorted(labels, key=len, reverse=True)
+    pattern = re.compile(r'(?<!\w)(?:' + '|'.join(map(re.escape, ordered)) + r')(?!\w)')
+
+    def classify(message):
+        best = best_key = None
+        for match in pattern.finditer(message.lower()):
+            label = labels[match.group()]
+            key = (label[0] is None, match.start(), -len(match.group()))
+            if best_key is None or key < best_key:
+                best, best_key = label, key
+        return best
+    return classify
+
+
+def run(label, func, messages, repeat=3):
+    elapsed = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [func(m) for m in messages]
+        elapsed = min(elapsed, time.perf_counter() - start)
+    print(f"{label:<30} {len(messages) / elapsed:>12,.0f} msg/s  ({elapsed:.3f}s for {len(messages):,})")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Penny merchant classifier benchmark")
+    parser.add_argument("--merchants", type=int, default=10000, help="Merchant names in the dictionary")
+    parser.add_argument("--count", type=int, default=100000, help="Messages to classify")
+    parser.add_argument("--baseline-count", type=int, default=2000,
+                        help="Messages for the (much slower) `in` loop and regex baselines")
+    args = parser.parse_args()
+
+    merchants = generate_merchants(args.merchants)
+    names = [name for entries in merchants.values() for name in entries]
+    messages = [sms["message"] for sms in generate_sms(args.count, merchants=names)]
+    sample = messages[:args.baseline_count]
+    table = keyword_table(merchants)
+
+    start = time.perf_counter()
+    classifier = MerchantClassifier(merchants)
+    print(f"automaton: {classifier.keywords:,} keywords, {len(classifier.goto):,} nodes, "
+          f"built in {time.perf_counter() - start:.2f}s")
+    start = time.perf_counter()
+    regex = regex_classifier(table)
+    print(f"regex alternation compiled in {time.perf_counter() - start:.2f}s\n")
+
+    naive = run("`in` loop", lambda m: naive_classify(table, m), sample, repeat=1)
+    alternation = run("regex alternation", regex, sample, repeat=1)
+    labels = run("MerchantClassifier.classify", classifier.classify, messages)
+
+    # End to end as SMSReader parses: templates are keyed with the merchant masked out
+    cache = TemplateCache(AmountExtractor(), classifier)
+    run("TemplateCache.parse", cache.parse, messages)
+    stats = cache.stats()
+    print(f"template cache: {stats['templates']:,} templates, hit rate {stats['hit_rate']:.2%}")
+
+    matched = sum(1 for label in labels if label and label[0])
+    print(f"\nmerchant found in {matched / len(messages):.1%} of messages")
+    # The `in` loop ignores word boundaries, so it may pick a keyword inside a longer word
+    print(f"disagreements on the baseline sample: `in` loop {sum(a != b for a, b in zip(naive, labels))}, "
+          f"regex {sum(a != b for a, b in zip(alternation, labels))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# benchmarks/bench_startup.py
+# Cold-start cost of the CLI and dashboard, each scenario in a fresh interpreter
+#
+#   python benchmarks/bench_startup.py --transactions 100000 --save startup.json
+#   python benchmarks/bench_startup.py --transactions 100000 --compare startup.json
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+PHONE = "08000000000"
+
+# Each snippet runs in a new process and prints its own elapsed seconds
+SCENARIOS = {
+    "import_cli": """
+import main
+""",
+    "notifier": """
+from notifier import Notifier
+Notifier().close()
+""",
+    "cli_ready": """
+from sms_reader import SMSReader
+from penny import BudgetManager, TransactionJournal
+from budget_rules import RuleEngine
+reader = SMSReader('data/mock_sms.json', 'data/processed_sms_ids.log')
+budget = BudgetManager('data/budget.json', store=TransactionJournal('data/transactions.ndjson',
+                                                                   'data/transactions_snapshot.bin'))
+RuleEngine.from_budgets(budget, state_file='data/rule_state.json')
+""",
+    "tenant_open": f"""
+from penny_service import PennyService
+PennyService(data_root='data/users').get('{PHONE}')
+""",
+    "ledger_page": """
+from penny import TransactionJournal
+ledger = TransactionJournal('data/transactions.ndjson', 'data/transactions_snapshot.bin').load_ledger()
+middle = len(ledger) // 2
+[t.to_dict() for t in ledger[middle:middle + 50]]
+""",
+}
+
+# First paint of the dashboard; only run when Tk and a display are available
+DASHBOARD = f"""
+import os
+import actual_dashboard
+from penny_service import PennyService
+actual_dashboard.PennyService = lambda: PennyService(data_root='data/users')
+
+def on_first_map(self, event):
+    if event.widget is self.root:
+        # Exit here, so the reported time is the first paint and not the teardown
+        print(time.perf_counter() - start, flush=True)
+        os._exit(0)
+
+actual_dashboard.DashboardWindow.on_first_map = on_first_map
+actual_dashboard.DashboardWindow('{PHONE}')
+"""
+
+
+def build_fixture(workdir, transactions):
+    """Snapshotted journal + tenant partition holding `transactions` rows, plus a small inbox"""
+    from penny import BudgetManager, Transaction, TransactionJournal
+    from penny_service import PennyService
+    from synthetic import generate_sms, write_corpus
+
+    data = os.path.join(workdir, "data")
+    os.makedirs(data, exist_ok=True)
+    write_corpus(os.path.join(data, "mock_sms.json"), 100, ndjson=False)
+    rows = [Transaction(i % 50000 + 0.5, 'debit', sms["date"], sms["source"])
+            for i, sms in enumerate(generate_sms(transactions, spread_days=max(1, transactions // 1000)))]
+
+    journal = TransactionJournal(os.path.join(data, "transactions.ndjson"),
+                                 os.path.join(data, "transactions_snapshot.bin"))
+    journal.append_many(rows)
+    BudgetManager(os.path.join(data, "budget.json"), store=journal).checkpoint()
+
+    tenant = PennyService(data_root=os.path.join(data, "users"), legacy_root=workdir).get(PHONE)
+    tenant.budget_manager.add_transactions(rows)
+    tenant.close()
+
+
+def run_snippet(snippet, workdir):
+    code = "import sys, time\nstart = time.perf_counter()\nsys.path.insert(0, %r)\n%s\nprint(time.perf_counter() - start)\n"
+    result = subprocess.run([sys.executable, "-c", code % (REPO, snippet)], cwd=workdir,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed")
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def dashboard_available():
+    try:
+        import tkinter
+        tkinter.Tk().destroy()
+        return True
+    except Exception:
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Penny startup benchmark")
+    parser.add_argument("--transactions", type=int, default=10000, help="Rows already in the ledger")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh processes per scenario; the median is kept")
+    parser.add_argument("--save", help="Write results to this JSON baseline file")
+    parser.add_argument("--compare", help="Compare against a saved JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed slowdown before a scenario counts as a regression")
+    args = parser.parse_args()
+
+    scenarios = dict(SCENARIOS)
+    if dashboard_available():
+        scenarios["dashboard_first_paint"] = DASHBOARD
+    else:
+        print("(no Tk display: skipping dashboard_first_paint)")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        build_fixture(workdir, args.transactions)
+        print(f"startup with {args.transactions:,} transactions (median of {args.repeat})")
+        for name, snippet in scenarios.items():
+            try:
+                times = [run_snippet(snippet, workdir) for _ in range(args.repeat)]
+            except RuntimeError as e:
+                print(f"  {name:<22} error: {e}")
+                continue
+            results[name] = {"seconds": statistics.median(times), "min_seconds": min(times)}
+            print(f"  {name:<22} {results[name]['seconds'] * 1000:9.1f} ms  (min {min(times) * 1000:.1f} ms)")
+
+    if args.save:
+        meta = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                "platform": platform.platform(), "transactions": args.transactions}
+        with open(args.save, 'w') as f:
+            json.dump({"meta": meta, "results": results}, f, indent=4)
+        print(f"\nsaved {args.save}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = 0
+        print(f"\nvs baseline ({baseline['meta'].get('timestamp', '?')}, tolerance {args.tolerance:.0%})")
+        for name, result in results.items():
+            before = baseline["results"].get(name)
+            if not before:
+                continue
+            delta = result["seconds"] / before["seconds"] - 1
+            flag = "  REGRESSION" if delta > args.tolerance else ""
+            regressions += bool(flag)
+            print(f"  {name:<22} {delta:+7.1%}{flag}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
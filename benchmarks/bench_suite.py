@@ -0,0 +1,252 @@
+# benchmarks/bench_suite.py
+# Hot-path micro-benchmarks over synthetic corpora: ops/sec, peak memory, scaling
+#
+#   python benchmarks/bench_suite.py --sizes 1000,10000,100000 --save baseline.json
+#   python benchmarks/bench_suite.py --sizes 1000,10000,100000 --compare baseline.json
+#
+# 10M messages works but needs several GB of RAM (the extraction and Transaction
+# cases hold the corpus in memory) and --no-memory is advisable at that size.
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from penny import BudgetManager, Transaction, TransactionLedger
+from sms_reader import SMSReader
+from synthetic import generate_sms, write_corpus
+
+QUERY_CALLS = 100000  # get_monthly_spending calls per measurement (O(1) each)
+PAGE_ROWS = 40        # rows the dashboard materializes per refresh
+PAGE_CALLS = 2000     # dashboard refreshes per measurement
+
+
+# Each case takes (n, ctx) and returns (prepare, ops): prepare() does untimed
+# setup and returns the callable to time; ops is the work it performs.
+
+def case_read_sms(n, ctx):
+    corpus = ctx.corpus(n, ndjson=False)
+
+    def prepare():
+        reader = SMSReader(corpus, ctx.path("ids.log"), ctx.path("stream.json"))
+        reader.reset_processed_ids()
+        return lambda: reader.read_sms_batch(limit=None)
+    return prepare, n
+
+
+def case_read_sms_stream(n, ctx):
+    corpus = ctx.corpus(n, ndjson=True)
+
+    def prepare():
+        reader = SMSReader(corpus, ctx.path("ids.log"), ctx.path("stream.json"))
+        reader.reset_processed_ids()
+        return lambda: sum(1 for _ in reader.iter_sms_stream(batch_size=10000, resume=False))
+    return prepare, n
+
+
+def case_extract_amount(n, ctx):
+    messages = [sms["message"] for sms in ctx.records(n)]
+    reader = SMSReader.parser()
+
+    def run():
+        extract = reader._extract_amount
+        for message in messages:
+            extract(message)
+    return lambda: run, n
+
+
+def case_transaction_init(n, ctx):
+    rows = [(i % 500000 + 0.5, 'debit', sms["date"], sms["source"]) for i, sms in enumerate(ctx.records(n))]
+    return lambda: lambda: [Transaction(*row) for row in rows], n
+
+
+def case_get_monthly_spending(n, ctx):
+    manager = ctx.manager(n)
+    months = sorted({(t.date.year, t.date.month) for t in manager.transactions[:: max(1, n // 1000)]})
+    calls = [months[i % len(months)] for i in range(QUERY_CALLS)]
+
+    def run():
+        spending = manager.get_monthly_spending
+        for year, month in calls:
+            spending(year, month)
+            spending(year, month, source="GTBank")
+    return lambda: run, 2 * QUERY_CALLS
+
+
+def case_export_transactions(n, ctx):
+    manager = ctx.manager(n)
+    export_file = ctx.path("export.json")
+    return lambda: lambda: manager.export_transactions(export_file), n
+
+
+def case_update_transactions(n, ctx):
+    # The data side of DashboardWindow.update_transactions: one visible page per
+    # refresh at random scroll offsets. Tk drawing itself needs a display.
+    manager = ctx.manager(n)
+    rng = random.Random(7)
+    offsets = [rng.randrange(max(1, n - PAGE_ROWS)) for _ in range(PAGE_CALLS)]
+
+    def run():
+        for offset in offsets:
+            manager.get_transactions(limit=PAGE_ROWS, offset=offset)
+    return lambda: run, PAGE_CALLS
+
+
+CASES = {
+    "read_sms": case_read_sms,
+    "read_sms_stream": case_read_sms_stream,
+    "extract_amount": case_extract_amount,
+    "transaction_init": case_transaction_init,
+    "get_monthly_spending": case_get_monthly_spending,
+    "export_transactions": case_export_transactions,
+    "update_transactions": case_update_transactions,
+}
+
+
+class Context:
+    """Per-size fixtures shared by the cases, built lazily in a temp dir"""
+
+    def __init__(self, workdir, seed):
+        self.workdir = workdir
+        self.seed = seed
+        self._records = {}
+        self._corpora = {}
+        self._managers = {}
+
+    def path(self, name):
+        return os.path.join(self.workdir, name)
+
+    def spread(self, n):
+        return max(1, min(365, n // 1000))  # bigger corpora span up to a year
+
+    def records(self, n):
+        if n not in self._records:
+            self._records = {n: list(generate_sms(n, seed=self.seed, spread_days=self.spread(n)))}
+        return self._records[n]
+
+    def corpus(self, n, ndjson):
+        key = (n, ndjson)
+        if key not in self._corpora:
+            name = f"sms_{n}.{'ndjson' if ndjson else 'json'}"
+            self._corpora[key] = write_corpus(self.path(name), n, ndjson=ndjson,
+                                              seed=self.seed, spread_days=self.spread(n))
+        return self._corpora[key]
+
+    def manager(self, n):
+        if n not in self._managers:
+            manager = BudgetManager(budget_file=self.path("budget.json"))
+            ledger = TransactionLedger(Transaction(i % 500000 + 0.5, 'debit', sms["date"], sms["source"])
+                                       for i, sms in enumerate(self.records(n)))
+            manager.transactions = ledger
+            manager.rebuild_aggregates()
+            self._managers = {n: manager}
+        return self._managers[n]
+
+
+def measure(case, n, ctx, repeat, memory):
+    prepare, ops = case(n, ctx)
+    best = float("inf")
+    for _ in range(repeat):
+        run = prepare()
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+
+    result = {"seconds": best, "ops": ops, "ops_per_sec": ops / best if best else float("inf")}
+    if memory:
+        run = prepare()
+        tracemalloc.start()
+        run()
+        result["peak_kib"] = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+    return result
+
+
+def scaling_exponent(points):
+    """Least-squares slope of log(seconds per run) vs log(n): ~1 linear, ~0 constant"""
+    points = [(math.log(n), math.log(r["seconds"])) for n, r in points if r["seconds"] > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    var = sum((x - mean_x) ** 2 for x, _ in points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var if var else None
+
+
+def compare(results, baseline, tolerance):
+    """Prints ops/sec deltas; returns the number of regressions beyond tolerance"""
+    regressions = 0
+    print(f"\nvs baseline ({baseline['meta'].get('timestamp', '?')}, tolerance {tolerance:.0%})")
+    for name, by_size in results.items():
+        for size, result in by_size.items():
+            before = baseline["results"].get(name, {}).get(size)
+            if not before:
+                continue
+            delta = result["ops_per_sec"] / before["ops_per_sec"] - 1
+            flag = ""
+            if delta < -tolerance:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(f"  {name:<22} n={int(size):>10,}  {delta:+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Penny hot-path benchmarks")
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="Comma-separated corpus sizes (1k to 10M)")
+    parser.add_argument("--cases", default=",".join(CASES), help="Comma-separated subset of cases")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case; the best is kept")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak-memory run")
+    parser.add_argument("--save", help="Write results to this JSON baseline file")
+    parser.add_argument("--compare", help="Compare against a saved JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Allowed ops/sec drop before a case counts as a regression")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    names = args.cases.split(",")
+    unknown = set(names) - set(CASES)
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+
+    results = {name: {} for name in names}
+    with tempfile.TemporaryDirectory() as workdir:
+        ctx = Context(workdir, args.seed)
+        for n in sizes:
+            print(f"n = {n:,}")
+            for name in names:
+                result = measure(CASES[name], n, ctx, args.repeat, not args.no_memory)
+                results[name][str(n)] = result
+                memory = f"  peak {result['peak_kib']:10,.0f} KiB" if "peak_kib" in result else ""
+                print(f"  {name:<22} {result['ops_per_sec']:>14,.0f} ops/s  ({result['seconds']:.3f}s){memory}")
+
+    print("\nscaling (time ~ n^k)")
+    for name, by_size in results.items():
+        k = scaling_exponent([(int(size), r) for size, r in by_size.items()])
+        print(f"  {name:<22} k = {k:.2f}" if k is not None else f"  {name:<22} k = n/a")
+
+    if args.save:
+        meta = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                "platform": platform.platform(), "sizes": sizes, "seed": args.seed, "repeat": args.repeat}
+        with open(args.save, 'w') as f:
+            json.dump({"meta": meta, "results": results}, f, indent=4)
+        print(f"\nsaved {args.save}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/synthetic.py
+# Deterministic synthetic bank-SMS corpus for benchmarks
+import json
+import random
+from datetime import date, timedelta
+
+TEMPLATES = [
+    ("GTBank", "Your account has been debited with ₦{amount} at {merchant}."),
+    ("Zenith Bank", "POS debit of NGN {amount} from Zenith Bank Card ending {card}"),
+    ("Access Bank", "Debit Alert: ₦{amount} paid to {merchant} via Flutterwave"),
+    ("UBA", "You have been debited NGN {amount} for airtime purchase."),
+    ("First Bank", "NGN {amount} was debited from your account for fuel at {merchant}."),
+    ("Access Bank", "NGN {amount} debited for gym membership payment."),
+    ("GTBank", "Debit: NGN {amount} transfer to JOHN DOE - {account}"),
+    ("Zenith Bank", "Debit alert: ₦{amount} sent to {merchant}."),
+    ("Kuda Bank", "Acct ending {card} debited {amount} NGN at {merchant}."),
+    ("Opay", "Card ending {short_card} debited {amount} for {merchant}."),
+]
+
+MERCHANTS = [
+    "Shoprite Lagos", "Jumia", "Konga", "Total Station", "Chicken Republic",
+    "Spar Supermarket", "Netflix Premium", "Eko Hotels & Suites",
+]
+
+
+def generate_sms(count, seed=42, start_date="2025-07-10", spread_days=1, merchants=MERCHANTS):
+    """
+    Yields `count` SMS dicts in the mock_sms.json format
+    The same seed always produces the same corpus; dates advance evenly
+    over `spread_days` days so larger corpora span several months
+    """
+    rng = random.Random(seed)
+    start = date.fromisoformat(start_date)
+    dates = [(start + timedelta(days=d)).isoformat() for d in range(spread_days)]
+    for i in range(count):
+        source, template = rng.choice(TEMPLATES)
+        amount = rng.randint(100, 500000) + rng.choice((0, 0.5, 0.25))
+        yield {
+            "id": f"txn{i:09d}",
+            "message": template.format(
+                amount=f"{amount:,.2f}",
+                merchant=rng.choice(merchants),
+                card=rng.randint(1000, 9999),
+                short_card=rng.randint(100, 999),
+                account=rng.randint(10 ** 9, 10 ** 10 - 1),
+            ),
+            "date": dates[i * spread_days // count],
+            "source": source,
+        }
+
+
+def generate_merchants(count, seed=7):
+    """
+    Deterministic merchant dictionary in the data/merchants.json shape,
+    {category: {merchant: [aliases]}}, with `count` unique merchant names
+    """
+    rng = random.Random(seed)
+    syllables = ["ade", "bola", "chi", "dun", "eko", "femi", "gbo", "ife", "jide", "ka", "lola",
+                 "mide", "nna", "olu", "pe", "ra", "sola", "tun", "uche", "wale", "yemi", "zi"]
+    kinds = ["Stores", "Ventures", "Kitchen", "Pharmacy", "Motors", "Mart", "Gadgets", "Fashion",
+             "Foods", "Energy", "Travels", "Fitness", "Digital", "Bakery", "Autos", "Suites"]
+    categories = ["Groceries", "Shopping", "Food & Dining", "Transport & Fuel", "Bills & Utilities",
+                  "Entertainment", "Travel & Hotels", "Health & Fitness", "Transfers"]
+    merchants = {category: {} for category in categories}
+    seen = set()
+    while len(seen) < count:
+        stem = "".join(rng.choice(syllables) for _ in range(rng.randint(2, 3))).capitalize()
+        name = f"{stem} {rng.choice(kinds)}"
+        if name in seen:
+            continue
+        seen.add(name)
+        aliases = [stem.upper()] if rng.random() < 0.3 else []
+        if rng.random() < 0.5:
+            aliases.append(f"{name} Ltd")
+        merchants[rng.choice(categories)][name] = aliases
+    return merchants
+
+
+def write_corpus(path, count, ndjson=True, **kwargs):
+    """
+    Streams a corpus to disk without holding it in memory
+    NDJSON (one object per line) or a single JSON array like mock_sms.json
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        if not ndjson:
+            f.write("[\n")
+        for i, sms in enumerate(generate_sms(count, **kwargs)):
+            if not ndjson and i:
+                f.write(",\n")
+            f.write(json.dumps(sms, ensure_ascii=False))
+            if ndjson:
+                f.write("\n")
+        if not ndjson:
+            f.write("\n]\n")
+    return path
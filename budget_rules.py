@@ -0,0 +1,192 @@
+# budget_rules.py
+
+# --------------------------------------------
+# Threshold-crossing budget rules, evaluated incrementally
+# as transactions arrive instead of polling is_budget_breached()
+# --------------------------------------------
+
+import json
+import os
+from collections import namedtuple
+from datetime import date as Date
+
+BudgetEvent = namedtuple('BudgetEvent', ['rule', 'period', 'level', 'spent', 'limit', 'message'])
+
+
+# ------------------------------
+# Class: MonthlyBudgetRule
+# Purpose: Fire at fractions (e.g. 50/80/100%) of the monthly budget
+# ------------------------------
+class MonthlyBudgetRule:
+    name = "monthly"
+
+    def __init__(self, levels=(0.5, 0.8, 1.0)):
+        self.levels = sorted(levels)
+
+    def period(self, year, month, day, source):
+        return f"{year:04d}-{month:02d}"
+
+    def limit(self, budget_manager, period):
+        year, month = map(int, period.split("-"))
+        return budget_manager.budget_for(year, month)
+
+    def spent(self, engine, period):
+        year, month = map(int, period.split("-"))
+        return engine.budget_manager.get_monthly_spending(year, month)
+
+    def describe(self, period, level, spent, limit):
+        if level >= 1.0:
+            return f"Budget limit exceeded for {period}! You are overspending (₦{spent:,.2f} of ₦{limit:,.2f})."
+        return f"You have used {level:.0%} of your {period} budget (₦{spent:,.2f} of ₦{limit:,.2f})."
+
+
+# ------------------------------
+# Class: SourceCapRule
+# Purpose: Fire when one bank/card exceeds its own monthly cap
+# ------------------------------
+class SourceCapRule:
+    levels = (1.0,)
+
+    def __init__(self, source, cap):
+        self.source = source
+        self.cap = float(cap)
+        self.name = f"source:{source}"
+
+    def period(self, year, month, day, source):
+        return f"{year:04d}-{month:02d}" if source == self.source else None
+
+    def limit(self, budget_manager, period):
+        return self.cap
+
+    def spent(self, engine, period):
+        year, month = map(int, period.split("-"))
+        return engine.budget_manager.get_monthly_spending(year, month, source=self.source)
+
+    def describe(self, period, level, spent, limit):
+        return f"{self.source} spending cap exceeded for {period} (₦{spent:,.2f} of ₦{limit:,.2f})."
+
+
+# ------------------------------
+# Class: DailyVelocityRule
+# Purpose: Fire when spending in a single day exceeds a limit
+# ------------------------------
+class DailyVelocityRule:
+    name = "daily"
+    levels = (1.0,)
+
+    def __init__(self, limit):
+        self.daily_limit = float(limit)
+
+    def period(self, year, month, day, source):
+        return f"{year:04d}-{month:02d}-{day:02d}"
+
+    def limit(self, budget_manager, period):
+        return self.daily_limit
+
+    def spent(self, engine, period):
+        return engine.budget_manager.get_daily_spending(Date.fromisoformat(period))
+
+    def describe(self, period, level, spent, limit):
+        return f"Daily spending limit exceeded on {period} (₦{spent:,.2f} of ₦{limit:,.2f})."
+
+
+# ------------------------------
+# Class: RuleEngine
+# Purpose: Track which thresholds have fired and emit events only on crossings
+# ------------------------------
+class RuleEngine:
+    def __init__(self, budget_manager, rules, state_file='data/rule_state.json', alert_past=False):
+        self.budget_manager = budget_manager
+        self.rules = list(rules)
+        self.state_file = state_file
+        # Crossings in periods that have already ended (e.g. an imported backlog of
+        # old SMS) are recorded as fired but only reported when alert_past is set
+        self.alert_past = alert_past
+        self.fired = self._load_state()  # {(rule name, period): highest level fired}
+        self.events = []  # events not yet taken by the caller
+        budget_manager.subscribe(self.on_transactions)
+
+    @classmethod
+    def from_budgets(cls, budget_manager, **kwargs):
+        # Optional budget.json keys: "alert_levels", "source_caps", "daily_limit"
+        budgets = budget_manager.budgets
+        rules = [MonthlyBudgetRule(budgets.get("alert_levels", (0.5, 0.8, 1.0)))]
+        rules += [SourceCapRule(source, cap) for source, cap in budgets.get("source_caps", {}).items()]
+        if budgets.get("daily_limit"):
+            rules.append(DailyVelocityRule(budgets["daily_limit"]))
+        return cls(budget_manager, rules, **kwargs)
+
+    def _load_state(self):
+        try:
+            with open(self.state_file, 'r') as f:
+                return {(name, period): level for name, period, level in json.load(f)}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"Error loading rule state: {e}")
+            return {}
+
+    def _save_state(self):
+        tmp_file = self.state_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump([[name, period, level] for (name, period), level in self.fired.items()], f)
+        os.replace(tmp_file, self.state_file)
+
+    def on_transactions(self, transactions):
+        # Only the periods touched by this batch are evaluated
+        touched = set()
+        for t in transactions:
+            _, trans_type, day, source = t._row()
+            if trans_type != 'debit':
+                continue
+            d = Date.fromordinal(day)
+            for rule in self.rules:
+                period = rule.period(d.year, d.month, d.day, source)
+                if period is not None:
+                    touched.add((rule, period))
+        self._evaluate(touched)
+
+    def reevaluate(self, since=None):
+        # Re-check every period that has fired, plus the current month (e.g. after a budget change).
+        # since=(year, month) also re-checks every month with spending from then on
+        today = Date.today()
+        months = {(today.year, today.month)}
+        if since is not None:
+            months |= {(year, month) for year, month, trans_type in self.budget_manager.monthly_totals
+                       if trans_type == 'debit' and (year, month) >= tuple(since)}
+        touched = {(rule, period) for rule in self.rules for (name, period) in self.fired if name == rule.name}
+        touched |= {(rule, rule.period(year, month, 1, None))
+                    for rule in self.rules if isinstance(rule, MonthlyBudgetRule) for year, month in months}
+        self._evaluate(touched, allow_reset=True)
+
+    def _evaluate(self, touched, allow_reset=False):
+        changed = False
+        today = Date.today().isoformat()  # "YYYY-MM-DD" starts with every current period
+        for rule, period in touched:
+            limit = rule.limit(self.budget_manager, period)
+            if not limit:
+                continue
+            spent = rule.spent(self, period)
+            crossed = [level for level in rule.levels if spent >= level * limit and (level < 1.0 or spent > limit)]
+            highest = crossed[-1] if crossed else None
+            previous = self.fired.get((rule.name, period))
+
+            if highest is not None and (previous is None or highest > previous):
+                self.fired[(rule.name, period)] = highest
+                if self.alert_past or today.startswith(period):
+                    self.events.append(BudgetEvent(rule.name, period, highest, spent, limit,
+                                                   rule.describe(period, highest, spent, limit)))
+                changed = True
+            elif allow_reset and previous is not None and (highest is None or highest < previous):
+                # Threshold no longer crossed (e.g. budget raised): allow it to fire again later
+                if highest is None:
+                    del self.fired[(rule.name, period)]
+                else:
+                    self.fired[(rule.name, period)] = highest
+                changed = True
+        if changed:
+            self._save_state()
+
+    def take_events(self):
+        events, self.events = self.events, []
+        return events
@@ -0,0 +1,127 @@
+# dedup_index.py
+
+# --------------------------------------------
+# Persistent index of processed SMS ids, built for millions of ids
+#
+# On disk:
+#   <log_file>       append-only text log, one id per line (diffable)
+#   <log_file>.idx   sorted 64-bit id fingerprints + the log offset they cover
+#
+# In memory the compacted ids are a sorted array('Q') searched with bisect,
+# plus a small set of fingerprints added since the last compaction.
+# --------------------------------------------
+
+import hashlib
+import json
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from heapq import merge
+
+
+def fingerprint(sms_id):
+    # 64-bit digest: ~3e-6 chance of any collision across ten million ids
+    return int.from_bytes(hashlib.blake2b(sms_id.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+# ------------------------------
+# Class: ProcessedIdIndex
+# Purpose: Set-like membership over processed ids with cheap append checkpoints
+# ------------------------------
+class ProcessedIdIndex:
+    HEADER = struct.Struct('<Q')  # byte offset of the log covered by the snapshot
+
+    def __init__(self, log_file='data/processed_sms_ids.log', compact_min=100000):
+        self.log_file = log_file
+        self.index_file = log_file + '.idx'
+        self.compact_min = compact_min
+        self.sorted = array('Q')  # compacted fingerprints, ascending
+        self.recent = set()       # fingerprints added since the last compaction
+        self.pending = []         # ids not yet written to the log
+        self.log_offset = 0       # log bytes already folded into self.sorted
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_file, 'rb') as f:
+                (self.log_offset,) = self.HEADER.unpack(f.read(self.HEADER.size))
+                self.sorted.frombytes(f.read())
+        except FileNotFoundError:
+            pass
+
+        if not os.path.exists(self.log_file):
+            self._migrate_legacy_json()
+            return
+
+        if os.path.getsize(self.log_file) < self.log_offset:
+            # Log was replaced underneath the snapshot: rebuild from the log alone
+            self.sorted, self.log_offset = array('Q'), 0
+        with open(self.log_file, 'rb+') as f:
+            f.seek(self.log_offset)
+            good_bytes = self.log_offset
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # Torn final write: cut it off so the next flush starts on a clean line
+                    f.truncate(good_bytes)
+                    break
+                good_bytes += len(line)
+                self.recent.add(fingerprint(line[:-1].decode('utf-8')))
+
+    def _migrate_legacy_json(self):
+        # One-shot import of the old unordered JSON list (processed_sms_ids.json)
+        legacy_file = os.path.splitext(self.log_file)[0] + '.json'
+        try:
+            with open(legacy_file, 'r') as f:
+                ids = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        for sms_id in sorted(ids):
+            self.add(str(sms_id))
+        self.checkpoint()
+
+    def __contains__(self, sms_id):
+        fp = fingerprint(sms_id)
+        if fp in self.recent:
+            return True
+        i = bisect_left(self.sorted, fp)
+        return i < len(self.sorted) and self.sorted[i] == fp
+
+    def __len__(self):
+        return len(self.sorted) + len(self.recent)
+
+    def add(self, sms_id):
+        if sms_id in self:
+            return  # already in the log, possibly compacted into self.sorted
+        self.recent.add(fingerprint(sms_id))
+        self.pending.append(sms_id)
+
+    def _flush_pending(self):
+        if self.pending:
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write(''.join(sms_id + '\n' for sms_id in self.pending))
+            self.pending = []
+
+    def checkpoint(self):
+        # Append only the ids added since the last checkpoint
+        self._flush_pending()
+        if len(self.recent) >= max(self.compact_min, len(self.sorted) // 8):
+            self.compact()
+
+    def compact(self):
+        # Fold recent fingerprints into the sorted array and snapshot it atomically
+        self._flush_pending()
+        self.sorted = array('Q', merge(self.sorted, sorted(self.recent)))
+        self.recent = set()
+        self.log_offset = os.path.getsize(self.log_file) if os.path.exists(self.log_file) else 0
+        tmp_file = self.index_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(self.HEADER.pack(self.log_offset))
+            self.sorted.tofile(f)
+        os.replace(tmp_file, self.index_file)
+
+    def clear(self):
+        self.sorted, self.recent, self.pending, self.log_offset = array('Q'), set(), [], 0
+        for path in (self.log_file, self.index_file):
+            if os.path.exists(path):
+                os.remove(path)
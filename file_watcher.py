@@ -0,0 +1,115 @@
+# file_watcher.py
+
+# --------------------------------------------
+# Wait for a file to change: inotify on Linux (via ctypes, no extra
+# dependency), stat polling everywhere else. The parent directory is
+# watched so that a replaced or newly created file is noticed too.
+# --------------------------------------------
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len; followed by a NUL-padded name
+
+
+def _inotify_libc():
+    if not hasattr(os, 'O_NONBLOCK'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    except OSError:
+        return None
+    if not (hasattr(libc, 'inotify_init1') and hasattr(libc, 'inotify_add_watch')):
+        return None  # not Linux
+    return libc
+
+
+# ------------------------------
+# Class: FileWatcher
+# Purpose: Block until a watched file may have changed, or a timeout passes
+# ------------------------------
+class FileWatcher:
+    def __init__(self, path, poll_interval=0.1, use_inotify=True):
+        self.path = os.path.abspath(path)
+        self.name = os.path.basename(self.path).encode()
+        self.poll_interval = poll_interval  # stat polling period when inotify is unavailable
+        self.fd = None
+        self._last_stat = self._stat()
+
+        libc = _inotify_libc() if use_inotify else None
+        if libc is not None:
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd >= 0:
+                mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+                if libc.inotify_add_watch(fd, os.path.dirname(self.path).encode(), mask) >= 0:
+                    self.fd = fd
+                else:
+                    os.close(fd)
+
+    @property
+    def mode(self):
+        return "inotify" if self.fd is not None else "polling"
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_ino, st.st_size, st.st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def wait(self, timeout=None):
+        """
+        Sleeps until the file (or its directory) changes or `timeout` seconds pass
+        Returns: True if a change was seen
+        """
+        if self.fd is not None:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while True:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                readable, _, _ = select.select([self.fd], [], [], remaining)
+                if not readable:
+                    return False
+                if self._read_events():
+                    return True
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._stat()
+            if current != self._last_stat:
+                self._last_stat = current
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(self.poll_interval if deadline is None
+                       else max(0.0, min(self.poll_interval, deadline - time.monotonic())))
+
+    def _read_events(self):
+        # Drains queued events; True if any concerned the watched file itself
+        # (other files in the directory, e.g. our own checkpoints, are ignored)
+        changed = False
+        try:
+            while True:
+                data = os.read(self.fd, 65536)
+                pos = 0
+                while pos < len(data):
+                    _, _, _, length = EVENT_HEADER.unpack_from(data, pos)
+                    pos += EVENT_HEADER.size
+                    if data[pos:pos + length].rstrip(b'\0') == self.name:
+                        changed = True
+                    pos += length
+        except BlockingIOError:
+            pass
+        return changed
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
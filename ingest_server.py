@@ -0,0 +1,209 @@
+# ingest_server.py
+
+# --------------------------------------------
+# Local asyncio SMS ingestion endpoint with micro-batching
+#
+# Protocol: newline-delimited JSON over TCP on localhost. Each line is one
+# SMS payload in the mock_sms.json format plus an optional "user" (phone).
+# The server answers every line with {"ok": true} once the payload is queued,
+# or {"ok": false, "error": ...}. When the queue is full the server stops
+# reading from the socket, so a fast gateway is slowed down by TCP itself.
+#
+#   python ingest_server.py serve --port 8765
+#   python ingest_server.py send data/mock_sms.json --user 07058918745
+# --------------------------------------------
+
+import argparse
+import asyncio
+import json
+import time
+from collections import defaultdict
+
+from penny_service import PennyService
+
+
+# ------------------------------
+# Class: IngestServer
+# Purpose: Accept pushed SMS, batch them by size or time, apply per tenant
+# ------------------------------
+class IngestServer:
+    def __init__(self, service, default_user=None, host='127.0.0.1', port=8765,
+                 batch_size=500, max_delay=0.05, queue_size=10000, on_event=None):
+        self.service = service
+        self.default_user = default_user
+        self.host = host
+        self.port = port
+        self.batch_size = batch_size
+        self.max_delay = max_delay      # seconds a partial batch may wait
+        self.queue_size = queue_size
+        self.on_event = on_event        # callback(user, BudgetEvent) for crossed thresholds
+        self.ingested = 0               # transactions added so far
+        self.queue = None
+        self.server = None
+        self._batcher = None
+
+    async def start(self):
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._batcher = asyncio.create_task(self._run_batcher())
+        self.server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]  # resolve port 0
+        return self
+
+    async def serve_forever(self):
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def stop(self):
+        # Stop accepting, then flush whatever is still queued
+        self.server.close()
+        await self.server.wait_closed()
+        await self.queue.join()
+        self._batcher.cancel()
+
+    async def _handle_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    sms = json.loads(line)
+                    if not isinstance(sms, dict):
+                        raise ValueError("payload must be a JSON object")
+                    user = sms.pop("user", None) or self.default_user
+                    if not user or "message" not in sms:
+                        raise ValueError("payload needs 'message' and a 'user'")
+                    if sms.get("id") in (None, ""):
+                        raise ValueError("payload needs a non-empty 'id'")  # ids drive dedup
+                except ValueError as e:
+                    writer.write(json.dumps({"ok": False, "error": str(e)}).encode() + b"\n")
+                else:
+                    await self.queue.put((user, sms))  # blocks while full: backpressure
+                    writer.write(b'{"ok": true}\n')
+                await writer.drain()
+        except ConnectionResetError:
+            pass
+        finally:
+            writer.close()
+
+    async def _run_batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                # Parsing and ledger updates are CPU/disk work: keep them off the event loop
+                await loop.run_in_executor(None, self._apply_batch, batch)
+            except Exception as e:
+                print(f"Error applying SMS batch: {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _apply_batch(self, batch):
+        by_user = defaultdict(list)
+        for user, sms in batch:
+            by_user[user].append(sms)
+        for user, records in by_user.items():
+            # One user's failure must not drop the other users' records in this batch
+            try:
+                added, events = self.service.get(user).ingest_records(records)
+            except Exception as e:
+                print(f"Error applying {len(records)} SMS for {user}: {e}")
+                continue
+            self.ingested += added
+            for event in events:
+                if self.on_event:
+                    self.on_event(user, event)
+                else:
+                    print(f"[ALERT] {user}: {event.message}")
+
+
+# ------------------------------
+# Class: IngestClient
+# Purpose: Local gateway stand-in that pushes SMS payloads to the server
+# ------------------------------
+class IngestClient:
+    def __init__(self, host='127.0.0.1', port=8765):
+        self.host = host
+        self.port = port
+
+    async def send(self, records, user=None, window=1000):
+        # Pipelines up to `window` payloads ahead of their acks; returns (accepted, rejected)
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        accepted = rejected = in_flight = 0
+
+        async def read_ack():
+            nonlocal accepted, rejected, in_flight
+            ack = json.loads(await reader.readline())
+            in_flight -= 1
+            if ack.get("ok"):
+                accepted += 1
+            else:
+                rejected += 1
+
+        for sms in records:
+            if user:
+                sms = dict(sms, user=user)
+            writer.write(json.dumps(sms).encode() + b"\n")
+            in_flight += 1
+            if in_flight >= window:
+                await writer.drain()
+                await read_ack()
+        await writer.drain()
+        while in_flight:
+            await read_ack()
+
+        writer.close()
+        await writer.wait_closed()
+        return accepted, rejected
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Penny local SMS ingestion endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="Run the ingestion server")
+    serve.add_argument("--batch-size", type=int, default=500)
+    serve.add_argument("--max-delay", type=float, default=0.05)
+    serve.add_argument("--queue-size", type=int, default=10000)
+    serve.add_argument("--default-user", help="User for payloads that do not name one")
+
+    send = sub.add_parser("send", help="Push a JSON array of SMS to a running server")
+    send.add_argument("file", help="SMS file in the mock_sms.json format")
+    send.add_argument("--user", help="Attach this user (phone) to every payload")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.command == "serve":
+        server = IngestServer(PennyService(), default_user=args.default_user, host=args.host, port=args.port,
+                              batch_size=args.batch_size, max_delay=args.max_delay, queue_size=args.queue_size)
+        print(f"Listening on {args.host}:{args.port}")
+        asyncio.run(server.serve_forever())
+    else:
+        with open(args.file, 'r') as f:
+            records = json.load(f)
+        start = time.perf_counter()
+        accepted, rejected = asyncio.run(IngestClient(args.host, args.port).send(records, user=args.user))
+        elapsed = time.perf_counter() - start
+        print(f"Sent {accepted} accepted / {rejected} rejected in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# ledger_snapshot.py
+
+# --------------------------------------------
+# Fixed-width binary snapshot of a TransactionLedger, read through mmap
+#
+# Layout (little-endian):
+#   header         magic, version, column count, rows, string and meta sections
+#   column table   name, array typecode, item size and byte offset per column
+#   columns        raw array bytes, one column after another, 8-byte aligned
+#   strings        the dictionaries behind the id columns (types, sources,
+#                  merchants, categories): count, then length + UTF-8 per entry
+#   meta           small JSON object kept for the caller (e.g. saved aggregates)
+#
+# Opening maps the file and casts each column in place, so startup reads only
+# the header and dictionaries, and range reads touch only the pages they use.
+# --------------------------------------------
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+MAGIC = b'PENNYLDG'
+VERSION = 1
+HEADER = struct.Struct('<8sHHIQQQQQ')  # magic, version, columns, reserved, rows, strings at/len, meta at/len
+COLUMN = struct.Struct('<16scB6xQ')    # name, typecode, item size, byte offset
+COUNT = struct.Struct('<I')
+NONE_LENGTH = 0xFFFFFFFF               # string length that stands for None
+COLUMNS = (('amounts', 'd'), ('days', 'i'), ('types', 'B'),
+           ('sources', 'I'), ('merchants', 'I'), ('categories', 'I'))
+DICTIONARIES = ('type_names', 'source_names', 'merchant_names', 'category_names')
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _little_endian(column, typecode):
+    # Raw bytes of an array or typed memoryview; snapshots are little-endian
+    # everywhere, so big-endian hosts swap a copy
+    data = memoryview(column).cast('B')
+    if sys.byteorder == 'little':
+        return data
+    swapped = array(typecode)
+    swapped.frombytes(data)
+    swapped.byteswap()
+    return swapped
+
+
+def _pack_strings(dictionaries):
+    out = bytearray()
+    for names in dictionaries:
+        out += COUNT.pack(len(names))
+        for name in names:
+            if name is None:
+                out += COUNT.pack(NONE_LENGTH)
+            else:
+                data = name.encode('utf-8')
+                out += COUNT.pack(len(data)) + data
+    return bytes(out)
+
+
+def write_snapshot(path, ledger, meta=None):
+    """
+    Atomically writes a ledger's columns and dictionaries to `path`
+    `meta` is any JSON-able object stored alongside, returned by LedgerSnapshot.meta
+    """
+    rows = len(ledger.amounts)
+    offset = _align(HEADER.size + COLUMN.size * len(COLUMNS))
+    table, layout = [], []
+    for name, typecode in COLUMNS:
+        column = getattr(ledger, name)
+        if len(column) != rows:
+            raise ValueError(f"Ledger column {name} has {len(column)} rows, expected {rows}")
+        itemsize = array(typecode).itemsize
+        table.append(COLUMN.pack(name.encode(), typecode.encode(), itemsize, offset))
+        layout.append((offset, _little_endian(column, typecode)))
+        offset = _align(offset + rows * itemsize)
+
+    strings = _pack_strings([getattr(ledger, name) for name in DICTIONARIES])
+    meta_bytes = json.dumps(meta).encode('utf-8') if meta is not None else b''
+    header = HEADER.pack(MAGIC, VERSION, len(COLUMNS), 0, rows,
+                         offset, len(strings), offset + len(strings), len(meta_bytes))
+
+    tmp_file = path + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        f.write(header)
+        f.write(b''.join(table))
+        for start, column in layout:
+            f.write(b'\0' * (start - f.tell()))
+            f.write(column)
+        f.write(b'\0' * (offset - f.tell()))
+        f.write(strings)
+        f.write(meta_bytes)
+    os.replace(tmp_file, path)
+
+
+# ------------------------------
+# Class: LedgerSnapshot
+# Purpose: Read-only, memory-mapped view of a snapshot file
+# ------------------------------
+class LedgerSnapshot:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size:
+                raise ValueError(f"Not a Penny ledger snapshot: {path}")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count, _, self.rows, strings_at, strings_len, meta_at, meta_len = \
+            HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"Not a Penny ledger snapshot: {path}")
+        if version != VERSION:
+            raise ValueError(f"Unsupported ledger snapshot version {version}: {path}")
+        if max(strings_at + strings_len, meta_at + meta_len) > size:
+            raise ValueError(f"Truncated ledger snapshot: {path}")
+
+        self.columns = self._map_columns(count, size)
+        self.dictionaries = self._read_strings(strings_at)
+        self.meta = json.loads(self._map[meta_at:meta_at + meta_len]) if meta_len else {}
+
+    def _map_columns(self, count, size):
+        # memoryviews straight onto the mapping: nothing is read until indexed
+        view = memoryview(self._map)
+        columns = {}
+        for i in range(count):
+            name, typecode, itemsize, offset = COLUMN.unpack_from(self._map, HEADER.size + i * COLUMN.size)
+            name, typecode = name.rstrip(b'\0').decode(), typecode.decode()
+            if array(typecode).itemsize != itemsize:
+                raise ValueError(f"Column {name} was written with {itemsize}-byte items: {self.path}")
+            end = offset + self.rows * itemsize
+            if end > size:
+                raise ValueError(f"Truncated ledger snapshot: {self.path}")
+            if sys.byteorder == 'little':
+                columns[name] = view[offset:end].cast(typecode)
+            else:
+                columns[name] = _little_endian(view[offset:end], typecode)
+        missing = [name for name, _ in COLUMNS if name not in columns]
+        if missing:
+            raise ValueError(f"Ledger snapshot is missing columns {missing}: {self.path}")
+        return columns
+
+    def _read_strings(self, offset):
+        dictionaries = {}
+        for name in DICTIONARIES:
+            (count,) = COUNT.unpack_from(self._map, offset)
+            offset += COUNT.size
+            names = []
+            for _ in range(count):
+                (length,) = COUNT.unpack_from(self._map, offset)
+                offset += COUNT.size
+                if length == NONE_LENGTH:
+                    names.append(None)
+                else:
+                    names.append(self._map[offset:offset + length].decode('utf-8'))
+                    offset += length
+            dictionaries[name] = names
+        return dictionaries
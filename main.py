@@ -1,33 +1,182 @@
 # main.py
 from sms_reader import SMSReader
 from notifier import Notifier
-from penny import BudgetManager
+from penny import BudgetManager, SQLiteTransactionStore, TransactionJournal
+from budget_rules import RuleEngine
+from penny_service import PennyService
+from metrics import METRICS, instrument_reader
+from spending_cube import GRANULARITIES, SpendingCube
+from datetime import date
+import argparse
 import os
+import time
 
-def main():
+def main(limit=1, stream=False, export=False, store="journal", user=None, parallel=0, metrics_dir=None,
+         follow=False, sms_file=None):
     # Ensure data folder exists
     os.makedirs("data", exist_ok=True)
+    if metrics_dir:
+        METRICS.enable(metrics_dir)
+    else:
+        METRICS.enable_from_env()
 
     # Step 1: Initialize core modules
-    reader = SMSReader()
     notifier = Notifier()
-    budget = BudgetManager()
+    user = user or default_user(store)
+    if user:
+        # Per-user partition under data/users/<phone>/
+        tenant = PennyService().get(user)
+        reader, budget, rules = tenant.sms_reader, tenant.budget_manager, tenant.rule_engine
+        cube = tenant.spending_cube
+        if sms_file:
+            reader.sms_file = sms_file  # stream positions are saved per source file
+    else:
+        reader = SMSReader(sms_file) if sms_file else SMSReader()
+        if store == "sqlite":
+            db = SQLiteTransactionStore()
+            db.migrate_from_json(journal=TransactionJournal())  # no-op after the first run
+            budget = BudgetManager(store=db)
+        else:
+            budget = BudgetManager(store=TransactionJournal())
+        rules = RuleEngine.from_budgets(budget)  # evaluates thresholds as transactions are added
+        cube = SpendingCube(budget, cube_file="data/spending_cube.json")  # rollups for --report
+    instrument_reader(reader)  # per-message stage timers, only when metrics are enabled
+
+    if follow:
+        # Tail an append-only NDJSON inbox; each appended batch is applied and alerted at once
+        print(f"👀 Following {reader.sms_file} (Ctrl+C to stop)")
+        try:
+            for batch in reader.follow():
+                budget.add_transactions(batch)
+                cube.save()
+                for event in rules.take_events():
+                    notifier.send_alert(event.message)
+        except KeyboardInterrupt:
+            print("Stopped following.")
+        notifier.close()
+        METRICS.write()
+        return
 
-    # Step 2: Read SMS transactions
-    transactions = reader.read_sms()
+    # Step 2: Read SMS transactions (one parse, one checkpoint per batch)
+    started = time.perf_counter()
+    if stream:
+        # Large NDJSON/array archives: constant memory, resumes from saved offset
+        transactions = reader.iter_sms_stream()
+    else:
+        with METRICS.stage("read"):
+            if parallel:
+                # Historical backfill of the whole archive across worker processes
+                transactions = reader.read_sms_parallel(workers=parallel)
+            else:
+                transactions = reader.read_sms_batch(limit=limit)
 
     # Step 3: Feed into budget system
-    for tx in transactions:
-        budget.add_transaction(tx)
+    if stream:
+        try:
+            for count, tx in enumerate(transactions, 1):
+                budget.add_transaction(tx)
+                if limit and count >= limit:
+                    break
+        finally:
+            transactions.close()
+    else:
+        budget.add_transactions(transactions)
+    cube.save()
+
+    # Step 4: Transactions are journaled as they are added; full export on request
+    if export:
+        with METRICS.stage("export"):
+            budget.export_transactions()
 
-    # Step 4: Save transaction log
-    budget.export_transactions()
+    # Step 5: Alert on thresholds crossed by this run (each fires once per period)
+    events = rules.take_events()
+    for event in events:
+        notifier.send_alert(event.message)
+    if not events:
+        if budget.is_budget_breached():
+            print("⚠️ Budget still exceeded (already alerted).")
+        else:
+            print("✅ All good. Budget not yet breached.")
 
-    # Step 5: Budget breach check
-    if budget.is_budget_breached():
-        notifier.send_alert("Budget limit exceeded! You are overspending.")
+    # Let queued alerts finish delivering before the process exits
+    notifier.close()
+    cache = reader.template_cache
+    METRICS.count("parse_cache_hits", cache.hits)
+    METRICS.count("parse_cache_misses", cache.misses)
+    if METRICS.enabled:
+        METRICS.observe("pipeline", time.perf_counter() - started)
+    paths = METRICS.write()
+    if paths:
+        print(f"📈 Metrics written to {', '.join(paths)}")
+
+def default_user(store="journal"):
+    # Once a login has taken over the global data (see PennyService._claim_legacy),
+    # the CLI without --user works on that same partition, like the dashboard
+    if store != "journal":
+        return None
+    return PennyService().legacy_owner()
+
+def report(granularity, start, end, source=None, store="journal", user=None):
+    # Answered from the saved spending cube; the ledger is only loaded if no cube exists yet
+    user = user or default_user(store)
+    if user:
+        cube = SpendingCube.open_saved(os.path.join(PennyService().tenant_dir(user), "spending_cube.json"))
+        if cube is None:
+            cube = PennyService().get(user).spending_cube
+            cube.save()
     else:
-        print("✅ All good. Budget not yet breached.")
+        cube = SpendingCube.open_saved("data/spending_cube.json")
+        if cube is None:
+            db = SQLiteTransactionStore() if store == "sqlite" else TransactionJournal()
+            cube = SpendingCube(BudgetManager(store=db), cube_file="data/spending_cube.json")
+            cube.save()
+
+    print(f"📊 {granularity.capitalize()} spending {start} → {end}" + (f" ({source})" if source else ""))
+    for label, total in cube.series(granularity, start, end, source):
+        print(f"  {label:<12} ₦{total:>16,.2f}")
+    print(f"  {'Total':<12} ₦{cube.total(start, end, source):>16,.2f}")
+    if source is None:
+        print("By source:")
+        for name, total in cube.by_source(start, end).items():
+            print(f"  {name:<20} ₦{total:>16,.2f}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Penny SMS ingestion")
+    parser.add_argument("--batch", type=int, default=1,
+                        help="Number of new SMS to process (0 = drain all)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream the SMS file incrementally (NDJSON or JSON array)")
+    parser.add_argument("--export", action="store_true",
+                        help="Also write the full ledger to transactions.json")
+    parser.add_argument("--store", choices=["journal", "sqlite"], default="journal",
+                        help="Transaction storage backend (sqlite migrates existing JSON on first use)")
+    parser.add_argument("--parallel", type=int, default=0, metavar="WORKERS",
+                        help="Backfill the whole archive on a process pool (ignores --batch)")
+    parser.add_argument("--user", metavar="PHONE",
+                        help="Process the given user's partition under data/users/ "
+                             "(default: the user who took over the global data, if any)")
+    parser.add_argument("--metrics", metavar="DIR",
+                        help="Record per-stage timings and write Prometheus/JSON metrics to DIR")
+    parser.add_argument("--follow", action="store_true",
+                        help="Keep running and ingest records as they are appended to an NDJSON inbox")
+    parser.add_argument("--inbox", metavar="PATH",
+                        help="SMS source file (default: data/mock_sms.json)")
+    parser.add_argument("--report", choices=GRANULARITIES,
+                        help="Print a spending report from the rollup cube instead of ingesting SMS")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat,
+                        help="Report start date, YYYY-MM-DD (default: 1 January this year)")
+    parser.add_argument("--to", dest="end", type=date.fromisoformat,
+                        help="Report end date, YYYY-MM-DD (default: today)")
+    parser.add_argument("--source", help="Limit the report to one bank/card source")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    if args.report:
+        end = args.end or date.today()
+        report(args.report, args.start or date(end.year, 1, 1), end, source=args.source,
+               store=args.store, user=args.user)
+    else:
+        main(limit=args.batch or None, stream=args.stream, export=args.export, store=args.store,
+             user=args.user, parallel=args.parallel, metrics_dir=args.metrics,
+             follow=args.follow, sms_file=args.inbox)
@@ -0,0 +1,212 @@
+# metrics.py
+
+# --------------------------------------------
+# Pipeline stage timing and counters, exported as a Prometheus text file
+# and a JSON snapshot. Disabled by default: a disabled stage() hands back a
+# shared no-op context manager, and per-message stages are only wrapped in
+# timers by instrument_reader() once metrics are enabled.
+#
+#   python main.py --batch 0 --metrics data/metrics
+#   PENNY_METRICS=data/metrics python actual_dashboard.py
+# --------------------------------------------
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Latency bucket upper bounds in seconds (Prometheus "le" labels)
+BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+# ------------------------------
+# Class: Histogram
+# Purpose: Fixed-bucket latency histogram for one stage
+# ------------------------------
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def cumulative(self):
+        running = 0
+        for bound, n in zip(BUCKETS + (float('inf'),), self.counts):
+            running += n
+            yield bound, running
+
+
+# ------------------------------
+# Class: Metrics
+# Purpose: Registry of stage histograms and counters shared by the pipeline
+# ------------------------------
+class Metrics:
+    def __init__(self):
+        self.enabled = False
+        self.output_dir = None
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()  # stages are observed from worker and dispatcher threads
+
+    def enable(self, output_dir=None):
+        self.enabled = True
+        self.output_dir = output_dir
+
+    def enable_from_env(self, var='PENNY_METRICS'):
+        # PENNY_METRICS=<dir> turns metrics on and names where write() puts the files
+        if os.environ.get(var):
+            self.enable(os.environ[var])
+        return self.enabled
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.counters = {}
+
+    def stage(self, name):
+        return _Stage(self, name) if self.enabled else _NULL_STAGE
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def count(self, name, n=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def timed(self, name, func):
+        # Wrapper for hot per-message callables; only installed while enabled
+        perf_counter = time.perf_counter
+        observe = self.observe
+
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(name, perf_counter() - start)
+        return wrapper
+
+    def timed_iter(self, name, func):
+        # Like timed(), for generator functions: times each step of the iteration
+        perf_counter = time.perf_counter
+        observe = self.observe
+
+        def wrapper(*args, **kwargs):
+            iterator = iter(func(*args, **kwargs))
+            try:
+                while True:
+                    start = perf_counter()
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        return
+                    observe(name, perf_counter() - start)
+                    yield item
+            finally:
+                close = getattr(iterator, 'close', None)
+                if close:
+                    close()
+        return wrapper
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "time": time.time(),
+                "counters": dict(self.counters),
+                "stages": {
+                    name: {
+                        "count": h.count,
+                        "sum_seconds": h.total,
+                        "mean_seconds": h.total / h.count if h.count else 0.0,
+                        "buckets": {("+Inf" if bound == float('inf') else repr(bound)): n
+                                    for bound, n in h.cumulative()},
+                    }
+                    for name, h in self.histograms.items()
+                },
+            }
+
+    def prometheus_text(self, prefix='penny'):
+        snap = self.snapshot()
+        lines = []
+        for name, value in sorted(snap["counters"].items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        metric = f"{prefix}_stage_duration_seconds"
+        if snap["stages"]:
+            lines.append(f"# HELP {metric} Time spent per pipeline stage call")
+            lines.append(f"# TYPE {metric} histogram")
+        for name, stage in sorted(snap["stages"].items()):
+            for bound, n in stage["buckets"].items():
+                lines.append(f'{metric}_bucket{{stage="{name}",le="{bound}"}} {n}')
+            lines.append(f'{metric}_sum{{stage="{name}"}} {stage["sum_seconds"]:.9f}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {stage["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, output_dir=None):
+        """Writes penny_metrics.prom and penny_metrics.json atomically; returns their paths"""
+        output_dir = output_dir or self.output_dir
+        if not self.enabled or not output_dir:
+            return None
+        os.makedirs(output_dir, exist_ok=True)
+        paths = []
+        for name, content in (("penny_metrics.prom", self.prometheus_text()),
+                              ("penny_metrics.json", json.dumps(self.snapshot(), indent=4))):
+            path = os.path.join(output_dir, name)
+            with open(path + '.tmp', 'w') as f:
+                f.write(content)
+            os.replace(path + '.tmp', path)
+            paths.append(path)
+        return paths
+
+
+METRICS = Metrics()
+
+
+def instrument_reader(reader):
+    """Times per-message stages of an SMSReader; a no-op unless metrics are enabled"""
+    if not METRICS.enabled or getattr(reader, '_instrumented', False):
+        return reader
+    reader._extract_amount = METRICS.timed("extract", reader._extract_amount)
+    reader.template_cache.parse = METRICS.timed("extract", reader.template_cache.parse)
+    reader.make_transaction = METRICS.timed("transaction", reader.make_transaction)
+    reader._stream_records = METRICS.timed_iter("load_record", reader._stream_records)
+    reader._instrumented = True
+    return reader
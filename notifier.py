@@ -1,30 +1,132 @@
 # notifier.py
 import json
-import os
-import pyttsx3
+import queue
+import threading
+import time
+from datetime import datetime
+
+from metrics import METRICS
+
+
+class ConsoleSink:
+    def emit(self, message):
+        print(f"[ALERT] {message}")
+
+    def close(self, timeout=None):
+        pass
+
+
+class LogSink:
+    # Append-only NDJSON alert log: one small write per alert, no rewrite
+    def __init__(self, alert_file='data/alert_log.ndjson'):
+        self.alert_file = alert_file
+
+    def emit(self, message):
+        entry = {"message": message, "time": datetime.now().isoformat(timespec="seconds")}
+        with open(self.alert_file, 'a') as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def close(self, timeout=None):
+        pass
+
+
+class VoiceSink:
+    # Speaks on its own thread so a long utterance never delays the other sinks.
+    # The engine is created on that thread, as pyttsx3 engines are not thread-safe.
+    # pyttsx3 is imported and initialized only when the first alert is spoken:
+    # init takes hundreds of milliseconds and fails on hosts without audio.
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.thread = None
+        self._start_lock = threading.Lock()
+
+    def emit(self, message):
+        if self.thread is None:
+            with self._start_lock:
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self._run, daemon=True)
+                    self.thread.start()
+        self.queue.put(message)
+
+    def _run(self):
+        try:
+            import pyttsx3
+            voice = pyttsx3.init()
+        except Exception as e:
+            print(f"Voice alerts unavailable: {e}")
+            voice = None
+
+        while True:
+            message = self.queue.get()
+            if message is None:
+                break
+            if voice is not None:
+                voice.say(message)
+                voice.runAndWait()
+
+    def close(self, timeout=None):
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join(timeout)
+
 
 class Notifier:
-    def __init__(self, alert_file='data/alert_log.json'):
+    def __init__(self, alert_file='data/alert_log.ndjson', sinks=None, coalesce_window=60.0, voice=True):
         self.alert_file = alert_file
-        self.voice = pyttsx3.init()
+        self.coalesce_window = coalesce_window  # seconds during which a repeated alert is dropped
+        self.log_sink = LogSink(alert_file)
+        self.voice_sink = VoiceSink() if voice and sinks is None else None
+        if sinks is None:
+            sinks = [ConsoleSink(), self.log_sink] + ([self.voice_sink] if self.voice_sink else [])
+        self.sinks = sinks
 
-        # Make sure alert log file exists
-        if not os.path.exists(self.alert_file):
-            with open(self.alert_file, 'w') as f:
-                json.dump([], f)
+        self.suppressed = 0  # duplicate alerts coalesced away
+        self._last_sent = {}
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
 
     def send_alert(self, message):
-        print(f"[ALERT] {message}")
-        self.log_alert(message)
-        self.voice_alert(message)
+        # Returns immediately; delivery happens on the dispatcher thread
+        self._queue.put((time.monotonic(), message))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    break
+                sent_at, message = item
+                last = self._last_sent.get(message)
+                if last is not None and sent_at - last < self.coalesce_window:
+                    self.suppressed += 1
+                    METRICS.count("alerts_suppressed")
+                    continue
+                self._last_sent[message] = sent_at
+                METRICS.count("alerts_sent")
+                with METRICS.stage("alert"):
+                    for sink in self.sinks:
+                        try:
+                            sink.emit(message)
+                        except Exception as e:
+                            print(f"Error delivering alert via {type(sink).__name__}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        # Wait until every queued alert has been handed to the sinks
+        self._queue.join()
+
+    def close(self, timeout=None):
+        self._queue.put(None)
+        self._thread.join(timeout)
+        for sink in self.sinks:
+            sink.close(timeout)
 
     def log_alert(self, message):
-        with open(self.alert_file, 'r') as f:
-            alerts = json.load(f)
-        alerts.append({"message": message})
-        with open(self.alert_file, 'w') as f:
-            json.dump(alerts, f, indent=4)
+        self.log_sink.emit(message)
 
     def voice_alert(self, message):
-        self.voice.say(message)
-        self.voice.runAndWait()
+        if self.voice_sink is None:
+            self.voice_sink = VoiceSink()
+        self.voice_sink.emit(message)
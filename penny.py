@@ -7,72 +7,726 @@
 # --------------------------------------------
 
 import json
-from datetime import datetime
+import math
+import os
+import sqlite3
+import sys
+from array import array
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date as Date, datetime
+
+from ledger_snapshot import COLUMNS, DICTIONARIES, LedgerSnapshot, write_snapshot
+from metrics import METRICS
+
+_np = False  # numpy module once imported, None if unavailable
+
+
+def _numpy():
+    # Optional vectorized ledger scans; numpy is slow to import, so load it on first scan
+    global _np
+    if _np is False:
+        try:
+            import numpy
+            _np = numpy
+        except ImportError:
+            _np = None
+    return _np
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
 
 # ------------------------------
 # Class: Transaction
 # Purpose: To store structured data from each SMS
 # ------------------------------
-def update_budget(self, monthly_amount):
-    self.budgets["monthly"] = float(monthly_amount)
-    self.save_budgets()
-    # Reset transactions to zero when budget changes
-    self.transactions = []
-    self.export_transactions()  # This clears the transactions.json file
 class Transaction:
-    def __init__(self, amount, trans_type, date, source):
-        self.amount = float(amount)
-        self.trans_type = trans_type  # 'credit' or 'debit'
-        self.date = datetime.strptime(date, "%Y-%m-%d")
-        self.source = source  # e.g. Bank name or card number
+    # A detached transaction holds its own values; once appended to a
+    # TransactionLedger it becomes a view over that ledger's row
+    __slots__ = ('_ledger', '_index', '_values', '_labels')
+
+    def __init__(self, amount, trans_type, date, source, merchant=None, category=None):
+        # date.fromisoformat is several times faster than strptime for YYYY-MM-DD;
+        # strptime still accepts dates without zero padding, e.g. "2025-7-1"
+        try:
+            day = Date.fromisoformat(date).toordinal()
+        except ValueError:
+            day = datetime.strptime(date, "%Y-%m-%d").toordinal()
+        self._ledger = None
+        self._index = None
+        self._values = (float(amount), _intern(trans_type), day, _intern(source))
+        self._labels = (_intern(merchant), _intern(category))
+
+    def _row(self):
+        if self._ledger is None:
+            return self._values
+        return self._ledger.row_values(self._index)
+
+    def _label_row(self):
+        # (merchant, category), kept apart from _row() so the hot aggregates stay 4-wide
+        if self._ledger is None:
+            return self._labels
+        return self._ledger.row_labels(self._index)
+
+    @property
+    def amount(self):
+        return self._row()[0]
+
+    @property
+    def trans_type(self):
+        return self._row()[1]  # 'credit' or 'debit'
+
+    @property
+    def day(self):
+        return self._row()[2]  # proleptic Gregorian ordinal
+
+    @property
+    def date(self):
+        return datetime.fromordinal(self._row()[2])
+
+    @property
+    def source(self):
+        return self._row()[3]  # e.g. Bank name or card number
+
+    @property
+    def merchant(self):
+        return self._label_row()[0]  # e.g. "Shoprite", or None if unrecognised
+
+    @property
+    def category(self):
+        return self._label_row()[1]  # e.g. "Groceries", or None
 
     def to_dict(self):
+        amount, trans_type, day, source = self._row()
+        data = {
+            "amount": amount,
+            "type": trans_type,
+            "date": Date.fromordinal(day).isoformat(),
+            "source": source
+        }
+        merchant, category = self._label_row()
+        if merchant is not None:
+            data["merchant"] = merchant
+        if category is not None:
+            data["category"] = category
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["amount"], data["type"], data["date"], data["source"],
+                   data.get("merchant"), data.get("category"))
+
+
+# ------------------------------
+# Class: TransactionLedger
+# Purpose: Compact columnar storage (array-backed) for many transactions
+# ------------------------------
+class TransactionLedger:
+    def __init__(self, transactions=()):
+        self.amounts = array('d')   # float64
+        self.days = array('i')      # int32 day ordinals
+        self.types = array('B')     # uint8 ids into type_names
+        self.sources = array('I')   # uint32 ids into source_names
+        self.merchants = array('I')   # uint32 ids into merchant_names (None included)
+        self.categories = array('I')  # uint32 ids into category_names (None included)
+        self.type_names = []
+        self.source_names = []
+        self.merchant_names = []
+        self.category_names = []
+        self._type_ids = {}
+        self._source_ids = {}
+        self._merchant_ids = {}
+        self._category_ids = {}
+        self._mapped = False  # columns are read-only memoryviews over a snapshot file
+        self.extend(transactions)
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        # Columns stay views over the mapped LedgerSnapshot until the first append
+        ledger = cls()
+        for name, _ in COLUMNS:
+            setattr(ledger, name, snapshot.columns[name])
+        for name in DICTIONARIES:
+            names = [_intern(value) for value in snapshot.dictionaries[name]]
+            setattr(ledger, name, names)
+            setattr(ledger, '_' + name.replace('_names', '_ids'), {value: i for i, value in enumerate(names)})
+        ledger._mapped = True
+        return ledger
+
+    def _materialize(self):
+        # Copy mapped columns into growable arrays; the mapping is released with the views
+        for name, typecode in COLUMNS:
+            column = array(typecode)
+            column.frombytes(memoryview(getattr(self, name)).cast('B'))
+            setattr(self, name, column)
+        self._mapped = False
+
+    @staticmethod
+    def _encode(value, names, ids):
+        code = ids.get(value)
+        if code is None:
+            code = ids[value] = len(names)
+            names.append(value)
+        return code
+
+    def append(self, transaction):
+        if self._mapped:
+            self._materialize()
+        amount, trans_type, day, source = transaction._row()
+        self.amounts.append(amount)
+        self.days.append(day)
+        self.types.append(self._encode(trans_type, self.type_names, self._type_ids))
+        self.sources.append(self._encode(source, self.source_names, self._source_ids))
+        merchant, category = transaction._label_row()
+        self.merchants.append(self._encode(merchant, self.merchant_names, self._merchant_ids))
+        self.categories.append(self._encode(category, self.category_names, self._category_ids))
+        # Re-point the object at its row so no per-transaction values are kept
+        transaction._ledger, transaction._index = self, len(self.amounts) - 1
+        transaction._values = transaction._labels = None
+        return transaction
+
+    def extend(self, transactions):
+        for transaction in transactions:
+            self.append(transaction)
+
+    def row_values(self, index):
+        return (self.amounts[index], self.type_names[self.types[index]],
+                self.days[index], self.source_names[self.sources[index]])
+
+    def row_labels(self, index):
+        return self.merchant_names[self.merchants[index]], self.category_names[self.categories[index]]
+
+    def _view(self, index):
+        view = Transaction.__new__(Transaction)
+        view._ledger, view._index, view._values, view._labels = self, index, None, None
+        return view
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._view(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ledger index out of range")
+        return self._view(index)
+
+    def __iter__(self):
+        return (self._view(i) for i in range(len(self)))
+
+    def __reversed__(self):
+        return (self._view(i) for i in range(len(self) - 1, -1, -1))
+
+    @property
+    def nbytes(self):
+        return sum(col.itemsize * len(col)
+                   for col in (self.amounts, self.days, self.types, self.sources, self.merchants, self.categories))
+
+    @staticmethod
+    def day_range(year, month=None):
+        # [first, last) day ordinals covering a year or a month
+        if month is None:
+            return Date(year, 1, 1).toordinal(), Date(year + 1, 1, 1).toordinal()
+        end = Date(year + 1, 1, 1) if month == 12 else Date(year, month + 1, 1)
+        return Date(year, month, 1).toordinal(), end.toordinal()
+
+    def _criteria(self, year, month, trans_type, source):
+        # Translate filters into column codes; None means "no match possible"
+        day_range = self.day_range(year, month) if year is not None else None
+        type_code = source_code = -1
+        if trans_type is not None:
+            type_code = self._type_ids.get(trans_type)
+        if source is not None:
+            source_code = self._source_ids.get(source)
+        if type_code is None or source_code is None:
+            return None
+        return day_range, type_code, source_code
+
+    def _numpy_mask(self, day_range, month, type_code, source_code):
+        np = _numpy()
+        mask = np.ones(len(self), dtype=bool)
+        if day_range is not None:
+            days = np.frombuffer(self.days, dtype=np.int32)
+            mask &= (days >= day_range[0]) & (days < day_range[1])
+        elif month is not None:
+            months = np.array([Date.fromordinal(int(d)).month for d in self.days], dtype=np.int8)
+            mask &= months == month
+        if type_code >= 0:
+            mask &= np.frombuffer(self.types, dtype=np.uint8) == type_code
+        if source_code >= 0:
+            mask &= np.frombuffer(self.sources, dtype=np.uint32) == source_code
+        return mask
+
+    def _match_indices(self, day_range, month, type_code, source_code):
+        lo, hi = day_range if day_range is not None else (None, None)
+        for i, (day, type_id, source_id) in enumerate(zip(self.days, self.types, self.sources)):
+            if lo is not None and not lo <= day < hi:
+                continue
+            if lo is None and month is not None and Date.fromordinal(day).month != month:
+                continue
+            if type_code >= 0 and type_id != type_code:
+                continue
+            if source_code >= 0 and source_id != source_code:
+                continue
+            yield i
+
+    def indices(self, year=None, month=None, trans_type=None, source=None):
+        criteria = self._criteria(year, month, trans_type, source)
+        if criteria is None or not len(self):
+            return []
+        day_range, type_code, source_code = criteria
+        np = _numpy()
+        if np is not None:
+            return np.flatnonzero(self._numpy_mask(day_range, month, type_code, source_code)).tolist()
+        return list(self._match_indices(day_range, month, type_code, source_code))
+
+    def total(self, year=None, month=None, trans_type=None, source=None):
+        criteria = self._criteria(year, month, trans_type, source)
+        if criteria is None or not len(self):
+            return 0.0
+        day_range, type_code, source_code = criteria
+        np = _numpy()
+        if np is not None:
+            mask = self._numpy_mask(day_range, month, type_code, source_code)
+            return float(np.frombuffer(self.amounts, dtype=np.float64)[mask].sum())
+        amounts = self.amounts
+        return math.fsum(amounts[i] for i in self._match_indices(day_range, month, type_code, source_code))
+
+    def filter(self, year=None, month=None, trans_type=None, source=None):
+        return [self._view(i) for i in self.indices(year, month, trans_type, source)]
+
+
+# ------------------------------
+# Class: TransactionJournal
+# Purpose: Append-only NDJSON transaction log with periodic binary snapshot compaction
+# ------------------------------
+class TransactionJournal:
+    def __init__(self, journal_file='transactions.ndjson', snapshot_file='transactions_snapshot.bin',
+                 compact_every=10000):
+        self.journal_file = journal_file
+        self.snapshot_file = snapshot_file  # memory-mapped ledger_snapshot file
+        self.compact_every = compact_every
+        self.snapshot_count = 0  # transactions already folded into the snapshot
+        self.journal_count = 0   # transactions appended since the last compaction
+        self.saved_aggregates = None  # BudgetManager.aggregate_state() stored with the snapshot
+
+    def _load_snapshot(self):
+        try:
+            snapshot = LedgerSnapshot(self.snapshot_file)
+        except FileNotFoundError:
+            return self._migrate_legacy_json()
+        self.saved_aggregates = snapshot.meta.get("aggregates")
+        return TransactionLedger.from_snapshot(snapshot)
+
+    def _migrate_legacy_json(self):
+        # One-shot conversion of the old JSON snapshot (transactions_snapshot.json)
+        legacy_file = os.path.splitext(self.snapshot_file)[0] + '.json'
+        try:
+            with open(legacy_file, 'r') as f:
+                ledger = TransactionLedger(Transaction.from_dict(d) for d in json.load(f)["transactions"])
+        except FileNotFoundError:
+            return TransactionLedger()
+        write_snapshot(self.snapshot_file, ledger)
+        return ledger
+
+    def load_ledger(self):
+        # Mapped snapshot first, then replay the journal tail
+        self.saved_aggregates = None
+        transactions = self._load_snapshot()
+        self.snapshot_count = len(transactions)
+
+        self.journal_count = 0
+        try:
+            with open(self.journal_file, 'rb+') as f:
+                good_bytes = 0
+                for line in f:
+                    try:
+                        # A last line without its newline is torn even if it parses
+                        if not line.endswith(b'\n'):
+                            raise ValueError("unterminated journal line")
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Torn final write: cut it off so later appends start on a clean line
+                        f.truncate(good_bytes)
+                        break
+                    good_bytes += len(line)
+                    # Entries already folded into the snapshot by an interrupted compaction
+                    if entry["seq"] < self.snapshot_count:
+                        continue
+                    transactions.append(Transaction.from_dict(entry))
+                    self.journal_count += 1
+        except FileNotFoundError:
+            pass
+        return transactions
+
+    def load(self):
+        return list(self.load_ledger())
+
+    def append(self, transaction):
+        self.append_many([transaction])
+
+    def append_many(self, transactions):
+        lines = []
+        for transaction in transactions:
+            entry = transaction.to_dict()
+            entry["seq"] = self.snapshot_count + self.journal_count + len(lines)
+            lines.append(json.dumps(entry) + "\n")
+        with open(self.journal_file, 'a') as f:
+            f.writelines(lines)
+        self.journal_count += len(lines)
+
+    def needs_compaction(self):
+        return self.compact_every and self.journal_count >= self.compact_every
+
+    def compact(self, transactions, aggregates=None):
+        # Write the new snapshot atomically before dropping the journal
+        if not isinstance(transactions, TransactionLedger):
+            transactions = TransactionLedger(transactions)
+        write_snapshot(self.snapshot_file, transactions,
+                       {"aggregates": aggregates} if aggregates is not None else None)
+        open(self.journal_file, 'w').close()
+        self.snapshot_count = len(transactions)
+        self.journal_count = 0
+
+
+# ------------------------------
+# Class: SQLiteTransactionStore
+# Purpose: Indexed transaction storage in SQLite (WAL mode) with JSON migration
+# ------------------------------
+class SQLiteTransactionStore:
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            amount REAL NOT NULL,
+            type TEXT NOT NULL,
+            source TEXT NOT NULL,
+            merchant TEXT,
+            category TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_transactions_period
+            ON transactions (year, month, type, source);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+    INSERT = ("INSERT INTO transactions (year, month, date, amount, type, source, merchant, category)"
+              " VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+
+    def __init__(self, db_file='data/penny.db'):
+        self.db_file = db_file
+        self.conn = sqlite3.connect(db_file)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(transactions)")}
+        with self.conn:
+            for column in ("merchant", "category"):
+                if column not in columns:  # databases created before classification
+                    self.conn.execute(f"ALTER TABLE transactions ADD COLUMN {column} TEXT")
+
+    @staticmethod
+    def _row(transaction):
+        return (transaction.date.year, transaction.date.month, transaction.date.strftime("%Y-%m-%d"),
+                transaction.amount, transaction.trans_type, transaction.source,
+                transaction.merchant, transaction.category)
+
+    @staticmethod
+    def _where(year=None, month=None, trans_type=None, source=None):
+        # Columns are added in index order so lookups use idx_transactions_period
+        clauses, params = [], []
+        for column, value in (("year", year), ("month", month), ("type", trans_type), ("source", source)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def load(self):
+        return self.query(newest_first=False)
+
+    def append(self, transaction):
+        self.append_many([transaction])
+
+    def append_many(self, transactions):
+        with self.conn:
+            self.conn.executemany(self.INSERT, [self._row(t) for t in transactions])
+
+    def needs_compaction(self):
+        return False
+
+    def compact(self, transactions, aggregates=None):
+        pass
+
+    def query(self, year=None, month=None, trans_type=None, source=None, limit=None, offset=0,
+              newest_first=True):
+        where, params = self._where(year, month, trans_type, source)
+        sql = "SELECT amount, type, date, source, merchant, category FROM transactions" + where
+        sql += " ORDER BY id DESC" if newest_first else " ORDER BY id"
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            params += [-1 if limit is None else limit, offset]
+        return [Transaction(*row) for row in self.conn.execute(sql, params)]
+
+    def aggregates(self, track_sources=True):
+        # BudgetManager.aggregate_state() computed with GROUP BY, without loading any row
+        def grouped(columns, where=""):
+            sql = f"SELECT {columns}, SUM(amount) FROM transactions {where} GROUP BY {columns}"
+            return [list(row) for row in self.conn.execute(sql)]
+
+        daily = [[Date.fromisoformat(day).toordinal(), total]
+                 for day, total in grouped("date", "WHERE type = 'debit'")]
         return {
-            "amount": self.amount,
-            "type": self.trans_type,
-            "date": self.date.strftime("%Y-%m-%d"),
-            "source": self.source
+            "rows": self.count(),
+            "track_sources": track_sources,
+            "monthly": grouped("year, month, type"),
+            "sources": grouped("year, month, type, source") if track_sources else [],
+            "categories": grouped("year, month, type, category", "WHERE category IS NOT NULL"),
+            "daily": daily,
         }
 
+    def debit_totals(self, start=0):
+        # (day ordinal, source, debit total) over the rows from position `start` on, for rollups
+        sql = ("SELECT date, source, SUM(amount) FROM"
+               " (SELECT date, source, amount, type FROM transactions ORDER BY id LIMIT -1 OFFSET ?)"
+               " WHERE type = 'debit' GROUP BY date, source")
+        return [(Date.fromisoformat(day).toordinal(), source, total)
+                for day, source, total in self.conn.execute(sql, (start,))]
+
+    def total(self, year=None, month=None, trans_type=None, source=None):
+        where, params = self._where(year, month, trans_type, source)
+        row = self.conn.execute("SELECT COALESCE(SUM(amount), 0) FROM transactions" + where, params).fetchone()
+        return row[0]
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+    def migrate_from_json(self, export_file='transactions.json', journal=None):
+        # One-shot import of the existing ledger; the journal is preferred as it is the newer source
+        if self.conn.execute("SELECT value FROM meta WHERE key = 'migrated_from'").fetchone():
+            return 0
+
+        transactions = journal.load() if journal else []
+        source_name = journal.journal_file if transactions else export_file
+        if not transactions:
+            try:
+                with open(export_file, 'r') as f:
+                    transactions = [Transaction.from_dict(d) for d in json.load(f)]
+            except FileNotFoundError:
+                transactions = []
+
+        with self.conn:
+            self.conn.executemany(self.INSERT, [self._row(t) for t in transactions])
+            self.conn.execute("INSERT INTO meta (key, value) VALUES ('migrated_from', ?)", (source_name,))
+        return len(transactions)
+
+    def close(self):
+        self.conn.close()
+
 
 # ------------------------------
 # Class: BudgetManager
 # Purpose: Handle user budgets, transaction logging, breach detection
 # ------------------------------
 class BudgetManager:
-    def __init__(self, budget_file='budget.json'):
+    def __init__(self, budget_file='budget.json', store=None, track_sources=True):
         self.budget_file = budget_file
-        self.transactions = []  # list of Transaction objects
+        self.store = store  # optional TransactionJournal / SQLiteTransactionStore
+        self.track_sources = track_sources
+        self.listeners = []  # callables notified with each batch of added transactions
+        if hasattr(store, "load_ledger"):
+            self.transactions = store.load_ledger()  # memory-mapped snapshot + journal tail
+        elif hasattr(store, "aggregates"):
+            self.transactions = None  # indexed store: rows stay in the database, read through query()
+        else:
+            self.transactions = TransactionLedger(store.load() if store else [])
+        if not self.restore_aggregates(getattr(store, "saved_aggregates", None)):
+            self.rebuild_aggregates()
         self.budgets = self.load_budgets()
 
     def load_budgets(self):
         try:
             with open(self.budget_file, 'r') as f:
-                return json.load(f)
+                budgets = json.load(f)
         except FileNotFoundError:
-            return {"monthly": 0.0}  # default budget
+            budgets = {"monthly": 0.0}  # default budget
+        self._index_budgets(budgets)
+        return budgets
 
     def save_budgets(self):
         with open(self.budget_file, 'w') as f:
             json.dump(self.budgets, f, indent=4)
 
-    def update_budget(self, monthly_amount):
-        self.budgets["monthly"] = float(monthly_amount)
+    # Budgets are an effective-dated series: budgets["history"] holds
+    # [["YYYY-MM", amount], ...] sorted by month; each amount applies from
+    # its month until the next entry. "monthly" mirrors the current amount.
+    def _index_budgets(self, budgets):
+        history = budgets.get("history") or []
+        self._budget_months = [tuple(map(int, effective.split("-"))) for effective, _ in history]
+        self._budget_amounts = [float(amount) for _, amount in history]
+
+    def budget_for(self, year=None, month=None):
+        now = datetime.now()
+        i = bisect_right(self._budget_months, (year or now.year, month or now.month))
+        if i:
+            return self._budget_amounts[i - 1]
+        return self.budgets.get("monthly", 0.0) if not self._budget_months else 0.0
+
+    def update_budget(self, monthly_amount, effective=None):
+        # Adds a budget version from `effective` ("YYYY-MM", default this month) onward;
+        # transactions, aggregates and processed SMS are left untouched
+        effective = effective or datetime.now().strftime("%Y-%m")
+        history = self.budgets.setdefault("history", [])
+        if not history and self.budgets.get("monthly"):
+            history.append(["0001-01", float(self.budgets["monthly"])])  # legacy flat budget: all earlier months
+        history[:] = [entry for entry in history if entry[0] != effective]
+        history.append([effective, float(monthly_amount)])
+        history.sort(key=lambda entry: entry[0])
+        self._index_budgets(self.budgets)
+        self.budgets["monthly"] = self.budget_for()
         self.save_budgets()
 
     def add_transaction(self, transaction: Transaction):
-        self.transactions.append(transaction)
+        self.add_transactions([transaction])
 
-    def get_monthly_spending(self):
-        now = datetime.now()
-        return sum(
-            t.amount for t in self.transactions
-            if t.trans_type == 'debit' and t.date.month == now.month and t.date.year == now.year
+    def add_transactions(self, transactions):
+        transactions = list(transactions)
+        with METRICS.stage("aggregate"):
+            if self.transactions is not None:
+                self.transactions.extend(transactions)
+            for t in transactions:
+                self._aggregate(t)
+        if self.store and transactions:
+            with METRICS.stage("store"):
+                self.store.append_many(transactions)
+                if self.store.needs_compaction():
+                    self.store.compact(self.transactions, self.aggregate_state())
+        if transactions:
+            METRICS.count("transactions_added", len(transactions))
+            with METRICS.stage("evaluate"):
+                for listener in self.listeners:
+                    listener(transactions)
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    # Running totals keyed by (year, month, type), optionally (year, month, type, source),
+    # and (year, month, type, category) for classified transactions; debits also per day
+    def _aggregate(self, t):
+        amount, trans_type, day, source = t._row()
+        date = Date.fromordinal(day)
+        key = (date.year, date.month, trans_type)
+        self.monthly_totals[key] += amount
+        if trans_type == 'debit':
+            self.daily_totals[day] += amount
+        if self.track_sources:
+            self.source_totals[key + (source,)] += amount
+        category = t.category
+        if category is not None:
+            self.category_totals[key + (category,)] += amount
+
+    def count(self):
+        # Number of transactions in the ledger
+        if self.transactions is None:
+            return self.store.count()
+        return len(self.transactions)
+
+    def rebuild_aggregates(self):
+        if self.transactions is None:
+            self.restore_aggregates(self.store.aggregates(self.track_sources))
+            return
+        self.monthly_totals = defaultdict(float)
+        self.source_totals = defaultdict(float)
+        self.category_totals = defaultdict(float)
+        self.daily_totals = defaultdict(float)  # day ordinal -> debit total
+        for t in self.transactions:
+            self._aggregate(t)
+
+    def aggregate_state(self):
+        # JSON-able running totals, saved with a ledger snapshot so reopening skips the rebuild
+        return {
+            "rows": self.count(),
+            "track_sources": self.track_sources,
+            "monthly": [[*key, total] for key, total in self.monthly_totals.items()],
+            "sources": [[*key, total] for key, total in self.source_totals.items()],
+            "categories": [[*key, total] for key, total in self.category_totals.items()],
+            "daily": [[day, total] for day, total in self.daily_totals.items()],
+        }
+
+    def restore_aggregates(self, state):
+        # Totals from aggregate_state(), plus any rows appended after it was taken;
+        # False if there is nothing usable and a full rebuild is needed
+        if (not state or state.get("track_sources") != self.track_sources or "daily" not in state
+                or state["rows"] > self.count()):
+            return False
+        self.monthly_totals = defaultdict(float, {tuple(row[:-1]): row[-1] for row in state["monthly"]})
+        self.source_totals = defaultdict(float, {tuple(row[:-1]): row[-1] for row in state["sources"]})
+        self.category_totals = defaultdict(float, {tuple(row[:-1]): row[-1] for row in state["categories"]})
+        self.daily_totals = defaultdict(float, {day: total for day, total in state["daily"]})
+        if self.transactions is not None:
+            for t in self.transactions[state["rows"]:]:
+                self._aggregate(t)
+        return True
+
+    def checkpoint(self):
+        # Fold the journal tail into the snapshot (e.g. on shutdown) so the next open
+        # maps the whole ledger instead of replaying and copying it
+        if self.store and getattr(self.store, "journal_count", 0):
+            self.store.compact(self.transactions, self.aggregate_state())
+
+    def verify_aggregates(self, rebuild=True):
+        # Recompute from the raw ledger; returns True if the running totals were consistent
+        running = (dict(self.monthly_totals), dict(self.source_totals), dict(self.category_totals),
+                   dict(self.daily_totals))
+        self.rebuild_aggregates()
+        consistent = all(
+            all(math.isclose(before.get(k, 0.0), after.get(k, 0.0), rel_tol=1e-9, abs_tol=1e-6)
+                for k in set(before) | set(after))
+            for before, after in zip(running, (self.monthly_totals, self.source_totals, self.category_totals,
+                                               self.daily_totals))
         )
+        if not rebuild:
+            self.monthly_totals = defaultdict(float, running[0])
+            self.source_totals = defaultdict(float, running[1])
+            self.category_totals = defaultdict(float, running[2])
+            self.daily_totals = defaultdict(float, running[3])
+        return consistent
+
+    def get_monthly_spending(self, year=None, month=None, source=None, category=None):
+        now = datetime.now()
+        key = (year or now.year, month or now.month, 'debit')
+        if category is not None:
+            return self.category_totals.get(key + (category,), 0.0)
+        if source is not None:
+            return self.source_totals.get(key + (source,), 0.0)
+        return self.monthly_totals.get(key, 0.0)
+
+    def get_daily_spending(self, day=None):
+        # Debit total for one date (default today)
+        return self.daily_totals.get((day or Date.today()).toordinal(), 0.0)
+
+    def get_transactions(self, year=None, month=None, trans_type=None, source=None, limit=None, offset=0):
+        # Newest first; an indexed store answers directly, otherwise scan the ledger columns
+        if hasattr(self.store, "query"):
+            return self.store.query(year, month, trans_type, source, limit=limit, offset=offset)
+        if year is month is trans_type is source is None:
+            end = len(self.transactions) - offset
+            start = 0 if limit is None else max(0, end - limit)
+            return self.transactions[start:max(0, end)][::-1]
+        matches = self.transactions.indices(year, month, trans_type, source)[::-1]
+        matches = matches[offset:offset + limit] if limit is not None else matches[offset:]
+        return [self.transactions[i] for i in matches]
 
     def is_budget_breached(self):
-        return self.get_monthly_spending() > self.budgets["monthly"]
+        return self.get_monthly_spending() > self.budget_for()
 
     def export_transactions(self, export_file="transactions.json"):
+        # Full rewrite of the ledger; with a journal attached, only needed for export
+        transactions = self.transactions if self.transactions is not None else self.store.query(newest_first=False)
         with open(export_file, 'w') as f:
-            json.dump([t.to_dict() for t in self.transactions], f, indent=4)
\ No newline at end of file
+            json.dump([t.to_dict() for t in transactions], f, indent=4)
\ No newline at end of file
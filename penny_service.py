@@ -0,0 +1,196 @@
+# penny_service.py
+
+# --------------------------------------------
+# Multi-tenant service: one partitioned data directory per user
+# and a bounded LRU of live BudgetManager/SMSReader pairs
+# --------------------------------------------
+
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from budget_rules import RuleEngine
+from penny import BudgetManager, TransactionJournal
+from sms_reader import SMSReader
+from spending_cube import SpendingCube
+
+
+# ------------------------------
+# Class: Tenant
+# Purpose: All live state for one user, rooted at data/users/<phone>/
+# ------------------------------
+class Tenant:
+    def __init__(self, phone, data_dir, default_sms_file=None):
+        self.phone = phone
+        self.data_dir = data_dir
+        os.makedirs(data_dir, exist_ok=True)
+
+        # Each user's inbox lives in their partition; fall back to the shared demo inbox
+        sms_file = self.path('mock_sms.json')
+        if not os.path.exists(sms_file) and default_sms_file:
+            sms_file = default_sms_file
+
+        self.budget_manager = BudgetManager(
+            budget_file=self.path('budget.json'),
+            store=TransactionJournal(journal_file=self.path('transactions.ndjson'),
+                                     snapshot_file=self.path('transactions_snapshot.bin'))
+        )
+        self.sms_reader = SMSReader(sms_file=sms_file,
+                                    log_file=self.path('processed_sms_ids.log'),
+                                    stream_state_file=self.path('sms_stream_state.json'))
+        self.rule_engine = RuleEngine.from_budgets(self.budget_manager, state_file=self.path('rule_state.json'))
+        self.spending_cube = SpendingCube(self.budget_manager, cube_file=self.path('spending_cube.json'))
+        self.lock = threading.RLock()  # serializes ingestion for this tenant
+        self.closed = threading.Event()  # set once an evicting PennyService has closed it
+
+    def path(self, name):
+        return os.path.join(self.data_dir, name)
+
+    def ingest(self, limit=None):
+        # Returns (number of new transactions, budget events crossed by them)
+        with self.lock:
+            transactions = self.sms_reader.read_sms_batch(limit=limit)
+            self.budget_manager.add_transactions(transactions)
+            if transactions:
+                self.spending_cube.save()
+            return len(transactions), self.rule_engine.take_events()
+
+    def ingest_records(self, records):
+        # Same as ingest(), for SMS records pushed in rather than read from the inbox
+        with self.lock:
+            transactions = self.sms_reader.read_sms_records(records)
+            self.budget_manager.add_transactions(transactions)
+            if transactions:
+                self.spending_cube.save()
+            return len(transactions), self.rule_engine.take_events()
+
+    def close(self):
+        # Waits for any ingest in flight, so the checkpoint sees a settled ledger
+        with self.lock:
+            self.spending_cube.save()
+            self.budget_manager.checkpoint()  # next open maps the snapshot without a journal replay
+            store = self.budget_manager.store
+            if hasattr(store, 'close'):
+                store.close()
+
+
+# ------------------------------
+# Class: PennyService
+# Purpose: Hand out tenants by phone, evicting the least recently used
+# ------------------------------
+class PennyService:
+    # Partition file -> where the single-user build kept it
+    LEGACY_FILES = {
+        'budget.json': 'budget.json',
+        'transactions.ndjson': 'transactions.ndjson',
+        'transactions_snapshot.bin': 'transactions_snapshot.bin',
+        'transactions_snapshot.json': 'transactions_snapshot.json',
+        'processed_sms_ids.log': 'data/processed_sms_ids.log',
+        'processed_sms_ids.log.idx': 'data/processed_sms_ids.log.idx',
+        'processed_sms_ids.json': 'data/processed_sms_ids.json',
+        'sms_stream_state.json': 'data/sms_stream_state.json',
+        'rule_state.json': 'data/rule_state.json',
+        'spending_cube.json': 'data/spending_cube.json',
+    }
+
+    def __init__(self, data_root='data/users', max_tenants=256, default_sms_file='data/mock_sms.json',
+                 legacy_root='.'):
+        self.data_root = data_root
+        self.legacy_root = legacy_root  # where the pre-partition global files live
+        self.max_tenants = max_tenants
+        self.default_sms_file = default_sms_file
+        self.tenants = OrderedDict()  # partition name -> Tenant, least recently used first
+        self.closing = {}             # partition name -> evicted Tenant still writing its files
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def partition_name(phone):
+        # Phones become directory names, so only allow a safe character set
+        name = re.sub(r'[^0-9A-Za-z+_-]', '_', str(phone).strip())
+        if not name.strip('_'):
+            raise ValueError(f"Invalid phone for data partition: {phone!r}")
+        return name
+
+    def tenant_dir(self, phone):
+        return os.path.join(self.data_root, self.partition_name(phone))
+
+    def legacy_owner(self):
+        # Partition that took over the global single-user data, if any
+        try:
+            with open(os.path.join(self.data_root, 'legacy_owner'), 'r') as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _claim_legacy(self, name):
+        # The first partition opened takes over the global budget, ledger and SMS
+        # state, so the old single user keeps their data; later users start empty
+        data_dir = os.path.join(self.data_root, name)
+        if os.path.exists(data_dir) or self.legacy_owner() is not None:
+            return
+        legacy = {target: os.path.join(self.legacy_root, source) for target, source in self.LEGACY_FILES.items()}
+        legacy = {target: source for target, source in legacy.items() if os.path.exists(source)}
+        if not legacy:
+            return
+        os.makedirs(data_dir)
+        for target, source in legacy.items():
+            os.replace(source, os.path.join(data_dir, target))
+        with open(os.path.join(self.data_root, 'legacy_owner'), 'w') as f:
+            f.write(name)
+        print(f"Moved the existing single-user data into {data_dir}")
+
+    def get(self, phone):
+        # Keyed by partition name: phones that share a directory share one Tenant
+        name = self.partition_name(phone)
+        while True:
+            with self.lock:
+                tenant = self.tenants.get(name)
+                if tenant is not None:
+                    self.tenants.move_to_end(name)
+                    return tenant
+                closing = self.closing.get(name)
+                if closing is None:
+                    self._claim_legacy(name)
+                    tenant = Tenant(phone, os.path.join(self.data_root, name), self.default_sms_file)
+                    self.tenants[name] = tenant
+                    evicted = []
+                    while len(self.tenants) > self.max_tenants:
+                        evicted.append(self.tenants.popitem(last=False))
+                        self.closing[evicted[-1][0]] = evicted[-1][1]
+                    break
+            # Reopen only after the evicted tenant has finished writing its files
+            closing.closed.wait()
+
+        # Closing checkpoints the ledger, so do it without blocking every other user
+        for idle_name, idle in evicted:
+            self._close(idle_name, idle)
+        return tenant
+
+    def _close(self, name, tenant):
+        try:
+            tenant.close()
+        finally:
+            tenant.closed.set()
+            with self.lock:
+                if self.closing.get(name) is tenant:
+                    del self.closing[name]
+
+    def evict(self, phone):
+        name = self.partition_name(phone)
+        with self.lock:
+            tenant = self.tenants.pop(name, None)
+            if tenant is not None:
+                self.closing[name] = tenant
+        if tenant is not None:
+            self._close(name, tenant)
+
+    def ingest(self, phone, limit=None):
+        return self.get(phone).ingest(limit=limit)
+
+    def close(self):
+        with self.lock:
+            tenants, self.tenants = list(self.tenants.items()), OrderedDict()
+            self.closing.update(tenants)
+        for name, tenant in tenants:
+            self._close(name, tenant)
@@ -1,126 +1,850 @@
+import codecs
+import heapq
+import itertools
 import json
 import os
 import re
-from penny import Transaction
+from collections import OrderedDict, namedtuple
+from dedup_index import ProcessedIdIndex
+from file_watcher import FileWatcher
+from metrics import METRICS
+from penny import Transaction, TransactionLedger
+
+MERCHANTS_FILE = 'data/merchants.json'
+
+AmountMatch = namedtuple('AmountMatch', ['amount', 'currency', 'confidence'])
+# Builds AmountMatch without the Python-level namedtuple __new__ on the hot path
+_new_tuple = tuple.__new__
+
+
+class AmountExtractor:
+    """Single-pass amount/currency extraction over one precompiled pattern"""
+
+    # Every candidate amount, optionally prefixed by a currency marker. Case is
+    # spelled out instead of re.IGNORECASE, which is markedly slower in `re`
+    PATTERN = re.compile(
+        r'(?:[Nn][Gg][Nn]|[Nn₦])\s?(?P<prefixed>\d[\d,]*(?:\.\d\d?)?)'
+        r'|(?P<bare>\d[\d,]*(?:\.\d\d?)?)'
+    )
+    SUFFIX = re.compile(r'\s?(?:(?:NGN|N|naira)(?![a-z])|₦)', re.IGNORECASE)
+    PLAIN = re.compile(r'\d{1,3}(?:,\d{3})*(?:\.\d{2})?')
+    # Card/account references such as "ending 1234" or "Acct No: ****5678"
+    REFERENCE = re.compile(
+        r'\b(?:ending|card|acct|account|a/c|ref)\b\.?\s*(?:no\.?|number)?\s*[:#]?\s*[x*]*$',
+        re.IGNORECASE
+    )
+
+    CONFIDENCE_PREFIX = 1.0
+    CONFIDENCE_SUFFIX = 0.8
+    CONFIDENCE_PLAIN = 0.3
+
+    def extract(self, message):
+        """
+        Scans the message once for the most confident amount
+        Returns: AmountMatch or None if no amount is found
+        """
+        match = self.PATTERN.search(message)
+        # Fast path: the first candidate is already currency-prefixed
+        if match is not None and match.lastindex == 1 and not self._glued(message, match.start()):
+            return _new_tuple(AmountMatch, (float(match.group(1).replace(',', '')), 'NGN', self.CONFIDENCE_PREFIX))
+        return self._resolve(message, match)
+
+    def extract_many(self, messages):
+        """
+        Extracts amounts from an iterable of messages
+        Returns: List of AmountMatch (or None) aligned with the input
+        """
+        extract = self.extract
+        return [extract(message) for message in messages]
+
+    @staticmethod
+    def _glued(message, start):
+        """A currency marker only counts at the start of a word ("N500", not "Transaction 500")"""
+        return start > 0 and message[start - 1].isalpha()
+
+    def _resolve(self, message, match):
+        """Walks candidate matches left to right, stopping at the first currency-prefixed one"""
+        best = None
+        while match is not None:
+            start = match.start()
+            amount_str = match.group(match.lastindex)
+
+            if match.lastindex == 1 and not self._glued(message, start):
+                return _new_tuple(AmountMatch, (float(amount_str.replace(',', '')), 'NGN', self.CONFIDENCE_PREFIX))
+
+            if best is None or best.confidence < self.CONFIDENCE_SUFFIX:
+                if self.SUFFIX.match(message, match.end()):
+                    best = AmountMatch(float(amount_str.replace(',', '')), 'NGN', self.CONFIDENCE_SUFFIX)
+                elif (best is None and self.PLAIN.fullmatch(amount_str)
+                        and not self.REFERENCE.search(message, max(0, start - 24), start)):
+                    best = AmountMatch(float(amount_str.replace(',', '')), None, self.CONFIDENCE_PLAIN)
+
+            match = self.PATTERN.search(message, match.end())
+
+        return best
+
+
+class SMSStream:
+    """
+    Incrementally decodes SMS records from newline-delimited JSON or a
+    top-level JSON array, holding at most one chunk plus one record in memory
+    """
+
+    def __init__(self, path, chunk_size=1 << 16):
+        self.path = path
+        self.chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+
+    # A failed decode with this much text buffered past it is a bad record, not a short read
+    MAX_RECORD = 1 << 20
+    # Where the next array element starts, used to step over a malformed one
+    NEXT_ELEMENT = re.compile(r',\s*(?=\{)')
+
+    def records(self, offset=0, complete_lines=False):
+        """
+        Yields (record, end_offset) pairs starting at byte `offset`
+        end_offset is the byte position to resume from after that record.
+        A malformed or non-object record is logged and yielded as None, so
+        callers can move their saved offset past it.
+        With complete_lines, an NDJSON line still missing its newline (a
+        writer mid-append) is left for the next read
+        """
+        with open(self.path, 'rb') as f:
+            first = f.read(self.chunk_size).lstrip()
+            is_array = first[:1] == b'['
+            f.seek(offset)
+            if is_array:
+                yield from self._array_records(f, offset)
+            else:
+                yield from self._ndjson_records(f, offset, complete_lines)
+
+    def _ndjson_records(self, f, offset, complete_lines=False):
+        for line in f:
+            if complete_lines and not line.endswith(b'\n'):
+                return
+            offset += len(line)
+            line = line.strip()
+            if line:
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    record = e
+                yield self._checked(record, offset), offset
+
+    def _checked(self, record, offset):
+        if isinstance(record, dict):
+            return record
+        problem = record if isinstance(record, Exception) else f"expected an object, got {type(record).__name__}"
+        print(f"Skipping malformed SMS record ending at byte {offset} of {self.path}: {problem}")
+        return None
+
+    def _array_records(self, f, offset):
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        buf = ''
+        pos = 0
+        mark = 0  # buf[:mark] is already counted in offset
+        started = offset > 0  # resuming mid-array skips the opening bracket
+        eof = False
+
+        while True:
+            # Skip separators between records
+            while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                pos += 1
+            if not started and pos < len(buf):
+                if buf[pos] != '[':
+                    raise ValueError("Expected a top-level JSON array")
+                started = True
+                pos += 1
+                continue
+            if pos < len(buf) and buf[pos] == ']':
+                return
+
+            try:
+                record, end = self._decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError as e:
+                if eof or len(buf) - pos > self.MAX_RECORD:
+                    if not buf[pos:].strip():
+                        return
+                    # Malformed element: resume at the next one (or at the end of the text)
+                    resync = self.NEXT_ELEMENT.search(buf, pos)
+                    end = resync.start() if resync else len(buf)
+                    if resync is None and not eof:
+                        pos = end
+                        continue  # read on until an element boundary turns up
+                    offset += len(buf[mark:end].encode('utf-8'))
+                    pos = mark = end
+                    yield self._checked(e, offset), offset
+                    continue
+                # Record straddles the chunk boundary: drop consumed text, read more
+                offset += len(buf[mark:pos].encode('utf-8'))
+                buf = buf[pos:] + decoder.decode(f.read(self.chunk_size))
+                pos = mark = 0
+                eof = f.tell() >= os.fstat(f.fileno()).st_size
+                if eof:
+                    buf += decoder.decode(b'', final=True)
+                continue
+
+            offset += len(buf[mark:end].encode('utf-8'))
+            pos = mark = end
+            yield self._checked(record, offset), offset
+
+
+class MerchantClassifier:
+    """
+    Labels a message with its merchant and spending category in one pass,
+    using an Aho-Corasick automaton over every merchant name and alias.
+    Keywords listed under an empty merchant name (e.g. "airtime") only set
+    the category, and lose to any merchant named in the same message.
+    A merchant whose name is a common word (e.g. "Total") is listed as
+    {"aliases": [...], "match_name": false} and matched by its aliases only
+    """
+
+    _loaded = {}  # (path, mtime) -> classifier, shared by readers and tenants
+
+    def __init__(self, merchants=None):
+        """merchants: {category: {merchant name or "": [aliases] or {"aliases": [...], "match_name": bool}}}"""
+        self.goto = [{}]   # node -> {char: next node}
+        self.fail = [0]    # node -> longest proper suffix node
+        self.out = [()]    # node -> ((keyword length, (merchant, category)), ...) ending here
+        self.keywords = 0
+        for category, entries in (merchants or {}).items():
+            for merchant, entry in entries.items():
+                for keyword in self.entry_keywords(merchant, entry):
+                    self._insert(keyword.lower(), (merchant or None, category))
+        self._link()
+
+    @staticmethod
+    def entry_keywords(merchant, entry):
+        """Keywords for one merchants.json entry: its name (unless match_name is false), then its aliases"""
+        if isinstance(entry, dict):
+            aliases, match_name = entry.get("aliases", []), entry.get("match_name", True)
+        else:
+            aliases, match_name = entry, True
+        return ([merchant] if merchant and match_name else []) + list(aliases)
+
+    @classmethod
+    def from_file(cls, path=MERCHANTS_FILE):
+        """
+        Builds (or reuses) the classifier for a merchants JSON file
+        Returns: MerchantClassifier, empty if the file is missing or unreadable
+        """
+        try:
+            key = (os.path.abspath(path), os.path.getmtime(path))
+        except OSError:
+            return cls()
+        classifier = cls._loaded.get(key)
+        if classifier is None:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    merchants = json.load(f)
+            except Exception as e:
+                print(f"Error loading merchants file: {e}")
+                return cls()
+            classifier = cls._loaded[key] = cls(merchants)
+        return classifier
+
+    def _insert(self, keyword, label):
+        keyword = keyword.strip()
+        if not keyword:
+            return
+        node = 0
+        for ch in keyword:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = self.goto[node][ch] = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append(())
+            node = nxt
+        if not self.out[node]:  # the first listing of a keyword wins
+            self.out[node] = ((len(keyword), label),)
+            self.keywords += 1
+
+    def _link(self):
+        # Breadth-first, so every suffix node is finished before it is used
+        queue = list(self.goto[0].values())
+        for node in queue:
+            for ch, child in self.goto[node].items():
+                suffix = self.fail[node]
+                while suffix and ch not in self.goto[suffix]:
+                    suffix = self.fail[suffix]
+                self.fail[child] = self.goto[suffix].get(ch, 0)
+                self.out[child] += self.out[self.fail[child]]
+                queue.append(child)
+
+    def classify(self, message):
+        """
+        Finds the best whole-word keyword: a named merchant over a category
+        keyword, then the leftmost, then the longest
+        Returns: (merchant or None, category), or None if nothing matches
+        """
+        found = self.find(message)
+        return found[0] if found else None
+
+    def find(self, message):
+        """
+        Same search as classify(), also reporting where the keyword sits
+        Returns: ((merchant or None, category), start, end), or None if nothing matches
+        """
+        text = message.lower()
+        goto, fail, out = self.goto, self.fail, self.out
+        size = len(text)
+        best = best_key = None
+        node = 0
+        for end, ch in enumerate(text, 1):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                for length, label in out[node]:
+                    start = end - length
+                    if (start and text[start - 1].isalnum()) or (end < size and text[end].isalnum()):
+                        continue
+                    key = (label[0] is None, start, -length)
+                    if best_key is None or key < best_key:
+                        best, best_key = (label, start, end), key
+        return best
+
+
+class TemplateCache:
+    """
+    Remembers, per bank template, whether it is a debit alert and which number
+    in it is the amount, so repeat formats skip the keyword check and the
+    extractor's candidate walk. Templates are keyed by the message text with
+    every number masked out, and with the merchant keyword the classifier
+    found masked too, so one template covers every merchant it is sent for
+    """
+
+    # Same number shape as AmountExtractor.PATTERN, so the runs line up with its candidates
+    NUMBER = re.compile(r'(\d[\d,]*(?:\.\d\d?)?)')
+    MERCHANT = '\x00'  # stands in for the classified keyword in signatures
+    NO_LABEL = (None, None)
+    NOT_DEBIT = (False, None)
+
+    def __init__(self, extractor, classifier=None, max_templates=1024):
+        self.extractor = extractor
+        self.classifier = classifier
+        self.max_templates = max_templates
+        # signature -> (is_debit, amount run index or None), LRU order
+        self.templates = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def parse(self, message):
+        """
+        Debit amount and labels for one message, from the cached template rule when known
+        Returns: (amount, merchant, category), or None if not a debit alert or no amount is found
+        """
+        found = self.classifier.find(message) if self.classifier is not None else None
+        if found is None:
+            label, text = self.NO_LABEL, message
+        else:
+            label, start, end = found
+            text = message[:start] + self.MERCHANT + message[end:]
+        parts = self.NUMBER.split(text)  # text, number, text, number, ..., text
+        signature = '#'.join(parts[::2])
+        rule = self.templates.get(signature)
+        if rule is None:
+            self.misses += 1
+            return self._learn(signature, message, text, parts, label)
+
+        self.hits += 1
+        self.templates.move_to_end(signature)
+        is_debit, index = rule
+        if not is_debit:
+            return None
+        if index is None:
+            # Template whose amount depends on the digits themselves: full extraction
+            match = self.extractor.extract(message)
+            return (match.amount,) + label if match else None
+        return (float(parts[2 * index + 1].replace(',', '')),) + label
+
+    def _learn(self, signature, message, text, parts, label):
+        # Decided on the masked text, so the rule holds whatever merchant fills the template
+        if "debit" not in text.lower():
+            self._remember(signature, self.NOT_DEBIT)
+            return None
+
+        match = self.extractor.extract(message)
+        index = None
+        # Currency-prefixed and -suffixed picks depend only on the surrounding text,
+        # so they hold for every message of the template. Plain-number picks also
+        # depend on digit grouping and are re-extracted each time.
+        if match is not None and match.confidence >= AmountExtractor.CONFIDENCE_SUFFIX:
+            positions = [i for i, run in enumerate(parts[1::2]) if float(run.replace(',', '')) == match.amount]
+            if len(positions) == 1:
+                index = positions[0]
+        self._remember(signature, (True, index))
+        return (match.amount,) + label if match else None
+
+    def _remember(self, signature, rule):
+        self.templates[signature] = rule
+        if len(self.templates) > self.max_templates:
+            self.templates.popitem(last=False)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"templates": len(self.templates), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0}
+
+
+def sms_id_of(sms):
+    """The record's id as a string, "" if it has none (never "None", which would dedup them all)"""
+    sms_id = sms.get('id')
+    return '' if sms_id is None else str(sms_id)
+
 
 class SMSReader:
     """Processes bank SMS messages into transactions"""
     
-    def __init__(self, sms_file='data/mock_sms.json', log_file='data/processed_sms_ids.json'):
+    def __init__(self, sms_file='data/mock_sms.json', log_file='data/processed_sms_ids.log',
+                 stream_state_file='data/sms_stream_state.json', merchants_file=MERCHANTS_FILE):
         """Initialize SMS processor"""
         self.sms_file = sms_file
         self.log_file = log_file
+        self.stream_state_file = stream_state_file
+        self._init_parser(merchants_file)
         self._ensure_data_dir()
         self.processed_ids = self._load_processed_ids()
 
+    def _init_parser(self, merchants_file=MERCHANTS_FILE):
+        """Set up the in-memory parsing state (only the merchant dictionary is read)"""
+        self.merchants_file = merchants_file
+        self.extractor = AmountExtractor()
+        self.classifier = MerchantClassifier.from_file(merchants_file)
+        self.template_cache = TemplateCache(self.extractor, self.classifier)
+        self.make_transaction = Transaction  # replaced by a timed wrapper when metrics are on
+
+    @classmethod
+    def parser(cls, merchants_file=MERCHANTS_FILE):
+        """Build a reader that can only parse, e.g. inside a worker process"""
+        reader = cls.__new__(cls)
+        reader._init_parser(merchants_file)
+        return reader
+
     def _ensure_data_dir(self):
-        """Create data directory if missing"""
+        """Create the directory holding the processing log if missing"""
         try:
-            os.makedirs('data', exist_ok=True)
+            os.makedirs(os.path.dirname(self.log_file) or '.', exist_ok=True)
         except Exception as e:
             print(f"Error creating data directory: {e}")
             raise
 
     def _load_processed_ids(self):
-        """Load set of already processed SMS IDs"""
-        if not os.path.exists(self.log_file):
-            return set()
-        
+        """Load the index of already processed SMS IDs (imports a legacy .json list once)"""
         try:
-            with open(self.log_file, 'r') as f:
-                return set(json.load(f))
+            return ProcessedIdIndex(self.log_file)
         except Exception as e:
             print(f"Error loading processed IDs: {e}")
-            return set()
+            raise
 
     def _save_processed_ids(self):
-        """Save processed IDs to JSON file"""
+        """Append IDs processed since the last checkpoint to the log"""
         try:
-            with open(self.log_file, 'w') as f:
-                json.dump(list(self.processed_ids), f, indent=4)
+            with METRICS.stage("checkpoint"):
+                self.processed_ids.checkpoint()
         except Exception as e:
             print(f"Error saving processed IDs: {e}")
             raise
 
     def reset_processed_ids(self):
-        """Clear processing history completely"""
-        self.processed_ids = set()
+        """Clear processing history completely (the benchmarks use it to re-run a corpus)"""
         try:
-            if os.path.exists(self.log_file):
-                os.remove(self.log_file)
+            self.processed_ids.clear()
         except Exception as e:
             print(f"Error resetting processed IDs: {e}")
             raise
 
-    def read_sms(self):
+    def _load_sms_data(self):
         """
-        Processes and returns exactly one new debit transaction
-        Returns: List containing one Transaction object or empty list if none found
+        Loads raw SMS records from the source file
+        Returns: List of SMS dicts sorted by id, or empty list on failure
         """
         if not os.path.exists(self.sms_file):
             return []
 
+        with METRICS.stage("load"):
+            try:
+                with open(self.sms_file, 'r') as f:
+                    sms_data = json.load(f)
+            except Exception as e:
+                print(f"Error reading SMS file: {e}")
+                return []
+
+            # Process in consistent order
+            return sorted(sms_data, key=lambda x: str(x.get('id', '')))
+
+    def _parse_sms(self, sms):
+        """
+        Converts one SMS record into a debit transaction
+        Returns: Transaction object or None if the message is not a debit alert
+        """
+        parsed = self.template_cache.parse(sms["message"])
+        if parsed is not None:
+            amount, merchant, category = parsed
+            return self.make_transaction(
+                amount=amount,
+                trans_type="debit",
+                date=sms.get("date", "2025-07-10"),
+                source=sms.get("source", "Unknown"),
+                merchant=merchant,
+                category=category
+            )
+        return None
+
+    def _accept_sms(self, sms):
+        """
+        Applies dedup and parsing to one raw SMS record
+        Returns: (sms_id, Transaction) for a new debit alert, otherwise None
+        """
         try:
-            with open(self.sms_file, 'r') as f:
-                sms_data = json.load(f)
+            sms_id = sms_id_of(sms)
+            if not sms_id or sms_id in self.processed_ids:
+                return None
+
+            transaction = self._parse_sms(sms)
+            if transaction is None:
+                return None
         except Exception as e:
-            print(f"Error reading SMS file: {e}")
-            return []
+            print(f"Error processing SMS {sms.get('id')}: {e}")
+            return None
+        return sms_id, transaction
 
-        # Process in consistent order
-        for sms in sorted(sms_data, key=lambda x: str(x.get('id', ''))):
-            try:
-                sms_id = str(sms.get('id'))
-                if not sms_id or sms_id in self.processed_ids:
+    def iter_sms(self, batch_size=1000):
+        """
+        Lazily yields new debit transactions from a single parse of the SMS file
+        Processed IDs are checkpointed once every `batch_size` transactions and
+        again when the generator is exhausted or closed
+        """
+        pending = 0
+        try:
+            for sms in self._load_sms_data():
+                accepted = self._accept_sms(sms)
+                if accepted is None:
                     continue
 
-                if "debit" in sms["message"].lower():
-                    amount = self._extract_amount(sms["message"])
-                    if amount is not None:
-                        transaction = Transaction(
-                            amount=amount,
-                            trans_type="debit",
-                            date=sms.get("date", "2025-07-10"),
-                            source=sms.get("source", "Unknown")
-                        )
-                        self.processed_ids.add(sms_id)
-                        self._save_processed_ids()
-                        return [transaction]
-            except Exception as e:
-                print(f"Error processing SMS {sms.get('id')}: {e}")
+                sms_id, transaction = accepted
+                self.processed_ids.add(sms_id)
+                pending += 1
+                yield transaction
+
+                if batch_size and pending >= batch_size:
+                    self._save_processed_ids()
+                    pending = 0
+        finally:
+            if pending:
+                self._save_processed_ids()
+
+    def iter_new_sms(self):
+        """
+        Yields (sms_id, Transaction) for new debit alerts without recording them
+        as processed; the caller calls mark_processed() once they are stored, so
+        a crash or shutdown before that point loses nothing
+        """
+        seen = set()  # duplicates within the file, since nothing is recorded yet
+        for sms in self._load_sms_data():
+            accepted = self._accept_sms(sms)
+            if accepted is None or accepted[0] in seen:
+                continue
+            seen.add(accepted[0])
+            yield accepted
+
+    def mark_processed(self, sms_ids):
+        """Records stored SMS ids and checkpoints them with one append"""
+        for sms_id in sms_ids:
+            self.processed_ids.add(sms_id)
+        self._save_processed_ids()
+
+    def _load_stream_state(self):
+        """Load the saved streaming position ({"offset", "last_id", "source", "inode"})"""
+        try:
+            with open(self.stream_state_file, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"offset": 0, "last_id": None}
+        except Exception as e:
+            print(f"Error loading stream state: {e}")
+            return {"offset": 0, "last_id": None}
+
+    def _save_stream_state(self, state):
+        """Atomically persist the streaming position, tagged with the file it belongs to"""
+        state = dict(state, source=os.path.abspath(self.sms_file), inode=os.stat(self.sms_file).st_ino)
+        tmp_file = self.stream_state_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_file, self.stream_state_file)
+
+    def reset_stream_state(self):
+        """Forget the saved streaming position"""
+        if os.path.exists(self.stream_state_file):
+            os.remove(self.stream_state_file)
+
+    def _stream_records(self, offset, skip_to_id=None, complete_lines=False):
+        """
+        Yields (record, end_offset) from the archive, skipping up to and including
+        `skip_to_id`; if that id never appears, replays the archive from the start
+        and relies on processed IDs for dedup
+        """
+        stream = SMSStream(self.sms_file)
+        if skip_to_id is None:
+            yield from stream.records(offset, complete_lines)
+            return
+
+        found = False
+        for sms, end_offset in stream.records(offset, complete_lines):
+            if found:
+                yield sms, end_offset
+            elif sms is not None and str(sms.get('id')) == skip_to_id:
+                found = True
+        if not found:
+            yield from stream.records(0, complete_lines)
+
+    def _resume_point(self, resume=True):
+        """
+        Where a stream pass starts: (state, byte offset, id to skip ahead to or None)
+        A position saved for another file is ignored; one saved for a file that
+        was since replaced (new inode) or shortened resumes after its last-seen id
+        """
+        fresh = {"offset": 0, "last_id": None}
+        state = self._load_stream_state() if resume else fresh
+        if state.get("source") != os.path.abspath(self.sms_file):
+            return fresh, 0, None
+        offset = state.get("offset") or 0
+        info = os.stat(self.sms_file)
+        if state.get("inode") != info.st_ino or offset > info.st_size:
+            return state, 0, state.get("last_id")
+        return state, offset, None
+
+    def _stream_batches(self, batch_size, complete_lines=False):
+        """
+        Yields (sms ids, transactions, stream state after them) from one pass over
+        the unread part of the source, without recording anything; the caller
+        checkpoints each batch once it is stored. The final tuple may be empty
+        when only non-debit or malformed records were read
+        """
+        state, offset, skip_to_id = self._resume_point()
+        start = state
+        ids, batch, seen = [], [], set()
+        for sms, end_offset in self._stream_records(offset, skip_to_id, complete_lines):
+            if sms is None:
+                state = {"offset": end_offset, "last_id": state.get("last_id")}
+                continue  # malformed record, already logged: step over it
+            state = {"offset": end_offset, "last_id": str(sms.get('id'))}
+            accepted = self._accept_sms(sms)
+            if accepted is None or accepted[0] in seen:
+                continue
+            seen.add(accepted[0])
+            ids.append(accepted[0])
+            batch.append(accepted[1])
+            if len(batch) >= batch_size:
+                yield ids, batch, state
+                ids, batch = [], []
+        if batch or state is not start:
+            yield ids, batch, state
+
+    def iter_sms_stream(self, batch_size=1000, resume=True, complete_lines=False):
+        """
+        Yields new debit transactions from a very large NDJSON or JSON-array
+        archive in file order, without loading it into memory. The byte offset
+        and last-seen id are checkpointed with the processed IDs; a resumed run
+        seeks to the saved offset, or skips ahead to the last-seen id if the
+        archive was rewritten and the offset no longer fits
+        """
+        if not os.path.exists(self.sms_file):
+            return
+
+        state, offset, skip_to_id = self._resume_point(resume)
+        pending = 0
+        try:
+            for sms, end_offset in self._stream_records(offset, skip_to_id, complete_lines):
+                if sms is None:
+                    state = {"offset": end_offset, "last_id": state.get("last_id")}
+                    continue  # malformed record, already logged: step over it
+                state = {"offset": end_offset, "last_id": str(sms.get('id'))}
+                accepted = self._accept_sms(sms)
+                if accepted is None:
+                    continue
+
+                sms_id, transaction = accepted
+                self.processed_ids.add(sms_id)
+                pending += 1
+                yield transaction
+
+                if batch_size and pending >= batch_size:
+                    self._save_processed_ids()
+                    self._save_stream_state(state)
+                    pending = 0
+        finally:
+            if pending:
+                self._save_processed_ids()
+            if state.get("offset") and state.get("offset") != offset:
+                self._save_stream_state(state)
+
+    def follow(self, stop=None, batch_size=1000, poll_interval=0.1):
+        """
+        Tails an append-only NDJSON source: yields lists of new debit transactions
+        as records are appended, parsing only bytes past the saved offset.
+        Wakes on inotify where available, otherwise polls stat every
+        `poll_interval` seconds. Runs until `stop` (a threading.Event) is set
+        """
+        if os.path.exists(self.sms_file) and not self._is_ndjson():
+            raise ValueError(f"Follow mode needs an NDJSON source, not a JSON array: {self.sms_file}")
+
+        watcher = FileWatcher(self.sms_file, poll_interval)
+        try:
+            while stop is None or not stop.is_set():
+                if os.path.exists(self.sms_file):
+                    for sms_ids, batch, state in self._stream_batches(batch_size, complete_lines=True):
+                        if batch:
+                            yield batch
+                        # Reached only once the caller has stored the batch and asked for more,
+                        # so an interrupt before that replays it instead of losing it
+                        if sms_ids:
+                            self.mark_processed(sms_ids)
+                        self._save_stream_state(state)
+                watcher.wait(timeout=0.5)  # bounded so that `stop` is noticed
+        finally:
+            watcher.close()
+
+    def read_sms_batch(self, limit=None):
+        """
+        Processes up to `limit` new debit transactions (all if None)
+        Returns: List of Transaction objects; processed IDs are saved once
+        """
+        transactions = []
+        sms_iter = self.iter_sms(batch_size=0)
+        try:
+            for transaction in sms_iter:
+                transactions.append(transaction)
+                if limit is not None and len(transactions) >= limit:
+                    break
+        finally:
+            sms_iter.close()
+        return transactions
+
+    def read_sms_records(self, records):
+        """
+        Processes SMS records pushed from elsewhere (e.g. the ingestion server)
+        Returns: List of new debit Transactions; processed IDs are saved once
+        """
+        transactions = []
+        for sms in records:
+            accepted = self._accept_sms(sms)
+            if accepted is None:
                 continue
+            sms_id, transaction = accepted
+            self.processed_ids.add(sms_id)
+            transactions.append(transaction)
+        if transactions:
+            self._save_processed_ids()
+        return transactions
 
-        return []
+    def read_sms_parallel(self, workers=None, shard_size=50000):
+        """
+        Processes the whole SMS archive on a process pool and returns new debit
+        transactions in the same id order as the sequential reader. NDJSON
+        archives are sharded by byte range and parsed entirely in the workers;
+        JSON arrays are decoded here and shipped to workers in id-range shards.
+        Processed IDs are saved once at the end
+        """
+        if not os.path.exists(self.sms_file):
+            return []
+
+        workers = workers or os.cpu_count() or 1
+        from concurrent.futures import ProcessPoolExecutor  # multiprocessing is only needed for backfills
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            if self._is_ndjson():
+                size = os.path.getsize(self.sms_file)
+                shard_bytes = max(1 << 20, size // (4 * workers))
+                starts = range(0, size, shard_bytes)
+                shards = pool.map(_parse_ndjson_shard, [self.sms_file] * len(starts), starts,
+                                  [min(size, start + shard_bytes) for start in starts],
+                                  itertools.repeat(self.merchants_file))
+            else:
+                records = self._load_sms_data()
+                shards = pool.map(_parse_record_shard,
+                                  [records[i:i + shard_size] for i in range(0, len(records), shard_size)],
+                                  itertools.repeat(self.merchants_file))
+            shards = list(shards)
+
+        # k-way merge by id; ties keep shard (file) order, like the stable sort
+        merged = heapq.merge(*[
+            zip(ids, itertools.repeat(n), itertools.count())
+            for n, (ids, _) in enumerate(shards)
+        ])
+        transactions = []
+        for sms_id, n, row in merged:
+            if sms_id in self.processed_ids:
+                continue
+            self.processed_ids.add(sms_id)
+            transactions.append(shards[n][1][row])
+        if transactions:
+            self._save_processed_ids()
+        return transactions
+
+    def _is_ndjson(self):
+        """True if the SMS file is newline-delimited JSON rather than a JSON array"""
+        with open(self.sms_file, 'rb') as f:
+            return f.read(4096).lstrip()[:1] != b'['
+
+    def read_sms(self):
+        """
+        Processes and returns exactly one new debit transaction
+        Returns: List containing one Transaction object or empty list if none found
+        """
+        return self.read_sms_batch(limit=1)
 
     def _extract_amount(self, message):
         """
         Extracts numeric amount from SMS text
         Returns: float amount or None if not found
         """
-        patterns = [
-            # Standard formats (₦1,234.56 or NGN 1,234.56)
-            r'(?:NGN|₦|N)\s?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            
-            # Debit alert formats
-            r'debited.*?(?:NGN|₦|N)\s?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            
-            # Amount before currency (1,234.56 NGN)
-            r'(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s?(?:NGN|₦|N)',
-            
-            # No decimal (₦1200)
-            r'(?:NGN|₦|N)(\d+)',
-            
-            # Plain numbers
-            r'\b(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\b'
-        ]
-
-        for pattern in patterns:
-            try:
-                match = re.search(pattern, message, re.IGNORECASE)
-                if match:
-                    amount_str = match.group(1).replace(',', '')
-                    return float(amount_str)
-            except Exception:
+        match = self.extractor.extract(message)
+        return match.amount if match else None
+
+
+def _parse_record_shard(records, merchants_file=MERCHANTS_FILE):
+    """
+    Worker: parse one shard of raw SMS records
+    Returns: (sorted sms ids, TransactionLedger with one row per id)
+    """
+    reader = SMSReader.parser(merchants_file)
+    ids = []
+    ledger = TransactionLedger()
+    for sms in sorted(records, key=lambda x: str(x.get('id', ''))):
+        try:
+            sms_id = sms_id_of(sms)
+            if not sms_id:
                 continue
+            transaction = reader._parse_sms(sms)
+        except Exception as e:
+            print(f"Error processing SMS {sms.get('id')}: {e}")
+            continue
+        if transaction is not None:
+            ids.append(sms_id)
+            ledger.append(transaction)
+    return ids, ledger
 
-        return None
\ No newline at end of file
+
+def _parse_ndjson_shard(path, start, end, merchants_file=MERCHANTS_FILE):
+    """Worker: parse the NDJSON lines that begin within bytes [start, end)"""
+    records = []
+    with open(path, 'rb') as f:
+        if start:
+            # Skip the partial line owned by the previous shard
+            f.seek(start - 1)
+            f.readline()
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                print(f"Skipping malformed SMS record ending at byte {f.tell()} of {path}: {e}")
+                continue
+            if isinstance(record, dict):
+                records.append(record)
+    return _parse_record_shard(records, merchants_file)
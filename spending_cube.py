@@ -0,0 +1,168 @@
+# spending_cube.py
+
+# --------------------------------------------
+# Time-bucketed debit rollups (daily / weekly / monthly x source),
+# kept current from BudgetManager.subscribe so that range reports never
+# scan the raw ledger. Only daily per-source cells are persisted; weekly,
+# monthly and all-source cells are derived from them on load.
+# --------------------------------------------
+
+import json
+import os
+from collections import defaultdict
+from datetime import date as Date, timedelta
+
+GRANULARITIES = ('daily', 'weekly', 'monthly')
+ALL_SOURCES = None  # source key of the all-sources cells
+
+
+def week_start(day):
+    # Ordinal 1 (0001-01-01) is a Monday, so weeks start where (ordinal - 1) % 7 == 0
+    return day - (day - 1) % 7
+
+
+# ------------------------------
+# Class: SpendingCube
+# Purpose: Incremental {granularity: {(bucket, source): total}} debit rollup
+# ------------------------------
+class SpendingCube:
+    def __init__(self, budget_manager, cube_file=None):
+        self.cube_file = cube_file
+        self.rows = 0  # ledger rows folded into the cube so far
+        self._reset()
+
+        if cube_file and self._load() and self.rows <= budget_manager.count():
+            self._catch_up(budget_manager, self.rows)  # only rows appended since the last save
+        else:
+            self._reset()
+            self._catch_up(budget_manager, 0)
+        budget_manager.subscribe(self.on_transactions)
+
+    def _catch_up(self, budget_manager, start):
+        ledger = budget_manager.transactions
+        if ledger is not None:
+            self._add_columns(ledger, start)
+            return
+        # Indexed store: the database sums the rows, nothing is loaded
+        for day, source, amount in budget_manager.store.debit_totals(start):
+            self._add(day, source, amount)
+        self.rows = budget_manager.count()
+
+    def _reset(self):
+        self.cells = {g: defaultdict(float) for g in GRANULARITIES}
+        self.sources = set()
+        self.rows = 0
+        self._months = {}  # day ordinal -> (year, month)
+
+    def _month(self, day):
+        key = self._months.get(day)
+        if key is None:
+            d = Date.fromordinal(day)
+            key = self._months[day] = (d.year, d.month)
+        return key
+
+    def _add(self, day, source, amount):
+        daily, weekly, monthly = self.cells['daily'], self.cells['weekly'], self.cells['monthly']
+        week, month = week_start(day), self._month(day)
+        for s in (source, ALL_SOURCES):
+            daily[(day, s)] += amount
+            weekly[(week, s)] += amount
+            monthly[(month, s)] += amount
+        self.sources.add(source)
+
+    def _add_columns(self, ledger, start):
+        # Straight off the ledger columns, without building Transaction views
+        debit = ledger._type_ids.get('debit')
+        names = ledger.source_names
+        for amount, day, type_id, source_id in zip(ledger.amounts[start:], ledger.days[start:],
+                                                   ledger.types[start:], ledger.sources[start:]):
+            if type_id == debit:
+                self._add(day, names[source_id], amount)
+        self.rows = len(ledger)
+
+    def on_transactions(self, transactions):
+        for t in transactions:
+            amount, trans_type, day, source = t._row()
+            if trans_type == 'debit':
+                self._add(day, source, amount)
+        self.rows += len(transactions)
+
+    def _load(self):
+        try:
+            with open(self.cube_file, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            print(f"Error loading spending cube: {e}")
+            return False
+        for day, source, amount in data.get("daily", []):
+            self._add(day, source, amount)
+        self.rows = data.get("rows", 0)
+        return True
+
+    def save(self):
+        if not self.cube_file:
+            return
+        daily = [[day, source, amount] for (day, source), amount in self.cells['daily'].items()
+                 if source is not ALL_SOURCES]
+        tmp_file = self.cube_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump({"rows": self.rows, "daily": daily}, f)
+        os.replace(tmp_file, self.cube_file)
+
+    @classmethod
+    def open_saved(cls, cube_file):
+        # Read-only cube straight from its file, without loading the ledger
+        cube = cls.__new__(cls)
+        cube.cube_file = cube_file
+        cube._reset()
+        if not cube._load():
+            return None
+        return cube
+
+    @staticmethod
+    def _bucket_keys(granularity, start, end):
+        """Yields (bucket key, label) for every bucket overlapping [start, end]"""
+        if granularity == 'daily':
+            for day in range(start.toordinal(), end.toordinal() + 1):
+                yield day, Date.fromordinal(day).isoformat()
+        elif granularity == 'weekly':
+            for week in range(week_start(start.toordinal()), end.toordinal() + 1, 7):
+                year, number, _ = Date.fromordinal(week).isocalendar()
+                yield week, f"{year}-W{number:02d}"
+        elif granularity == 'monthly':
+            year, month = start.year, start.month
+            while (year, month) <= (end.year, end.month):
+                yield (year, month), f"{year:04d}-{month:02d}"
+                year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    def series(self, granularity, start, end, source=ALL_SOURCES):
+        """
+        Debit totals per bucket between two dates (inclusive), zero-filled
+        Weekly and monthly buckets cover whole weeks/months touching the range
+        Returns: List of (label, total)
+        """
+        if granularity not in self.cells:
+            raise ValueError(f"Unknown granularity: {granularity!r} (expected one of {GRANULARITIES})")
+        cells = self.cells[granularity]
+        return [(label, cells.get((key, source), 0.0)) for key, label in self._bucket_keys(granularity, start, end)]
+
+    def total(self, start, end, source=ALL_SOURCES):
+        """Exact debit total between two dates (inclusive), from whole months plus daily edges"""
+        total = 0.0
+        day = start
+        while day <= end:
+            month_end = (Date(day.year + day.month // 12, day.month % 12 + 1, 1) - timedelta(days=1))
+            if day.day == 1 and month_end <= end:
+                total += self.cells['monthly'].get(((day.year, day.month), source), 0.0)
+                day = month_end + timedelta(days=1)
+            else:
+                total += self.cells['daily'].get((day.toordinal(), source), 0.0)
+                day += timedelta(days=1)
+        return total
+
+    def by_source(self, start, end):
+        """Returns: {source: debit total between two dates}, largest first"""
+        totals = {source: self.total(start, end, source) for source in self.sources}
+        return dict(sorted(((s, t) for s, t in totals.items() if t), key=lambda item: -item[1]))